@@ -5,6 +5,9 @@ import subprocess
 from pathlib import Path
 from typing import Callable, Optional
 
+import cv2
+import numpy as np
+
 from .config import MAGICK_PATH, PROJECTS_ROOT
 
 # Pillow est généralement dispo (vu aussi dans ton projet), mais on reste safe
@@ -53,20 +56,72 @@ def _maybe_invert_bmp_for_potrace(bmp_path: Path) -> None:
         return
 
 
+# "magick" : ImageMagick en sous-processus (historique)
+# "numpy"  : seuillage en process (pas de sous-processus par frame) ;
+#            le thinning reste fait par ImageMagick
+BITMAP_ENGINES = ("magick", "numpy")
+
+# poids Rec.709 du "-colorspace Gray" d'ImageMagick, dans l'ordre BGR d'OpenCV
+_GRAY_BGR_WEIGHTS = np.array([0.072186, 0.715158, 0.212656], dtype=np.float32)
+
+
+def _threshold_png_numpy(
+    png_path: Optional[Path],
+    bmp_path: Path,
+    threshold: int,
+    *,
+    data: Optional[bytes] = None,
+) -> None:
+    """
+    Équivalent NumPy de "magick in.png -colorspace Gray -threshold T% out.bmp"
+    + normalisation de polarité (_maybe_invert_bmp_for_potrace), en une passe.
+    """
+    if data is not None:
+        bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    else:
+        bgr = cv2.imread(str(png_path), cv2.IMREAD_COLOR)
+    if bgr is None:
+        raise RuntimeError(f"PNG illisible : {png_path}")
+
+    gray = bgr.astype(np.float32) @ _GRAY_BGR_WEIGHTS
+    white = gray > threshold * 2.55
+
+    # fond noir dominant (> 50% sombre) => inversion pour Potrace
+    if np.count_nonzero(white) * 2 < white.size:
+        np.logical_not(white, out=white)
+
+    if not cv2.imwrite(str(bmp_path), white.view(np.uint8) * np.uint8(255)):
+        raise RuntimeError(f"Écriture BMP impossible : {bmp_path}")
+
+
 def _convert_png_to_bmp(
-    png_path: Path,
+    png_path: Optional[Path],
     bmp_path: Path,
     threshold: int,
     thinning: bool,
+    *,
+    data: Optional[bytes] = None,
+    engine: str = "magick",
 ) -> None:
+    """
+    data : octets PNG déjà en mémoire (flux FFmpeg) -> passés à ImageMagick
+    sur stdin, png_path est alors ignoré.
+    engine : voir BITMAP_ENGINES.
+    """
     if not (0 <= threshold <= 100):
         raise ValueError("threshold doit être dans [0..100]")
+    if engine not in BITMAP_ENGINES:
+        raise ValueError(f"engine bitmap inconnu : {engine!r} (attendu : {', '.join(BITMAP_ENGINES)})")
 
     bmp_path.parent.mkdir(parents=True, exist_ok=True)
 
+    if engine == "numpy" and not thinning:
+        _threshold_png_numpy(png_path, bmp_path, threshold, data=data)
+        return
+
     cmd = [
         str(MAGICK_PATH),
-        str(png_path),
+        "png:-" if data is not None else str(png_path),
         "-colorspace",
         "Gray",
         "-threshold",
@@ -79,9 +134,9 @@ def _convert_png_to_bmp(
     cmd.append(str(bmp_path))
 
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        subprocess.run(cmd, input=data, check=True, capture_output=True)
     except subprocess.CalledProcessError as e:
-        stderr = (e.stderr or "").strip()
+        stderr = (e.stderr or b"").decode(errors="replace").strip()
         raise RuntimeError(f"ImageMagick a échoué :\n{stderr}") from e
 
     # Normalisation de polarité pour Potrace (anti-cadre)
@@ -95,6 +150,8 @@ def convert_project_frames_to_bmp(
     max_frames: Optional[int] = None,
     frame_callback: Optional[Callable[[int, int, Path], None]] = None,
     cancel_cb: Optional[Callable[[], bool]] = None,
+    *,
+    engine: str = "magick",
 ) -> Path:
     project_root = PROJECTS_ROOT / project_name
     frames_dir = project_root / "frames"
@@ -114,7 +171,7 @@ def convert_project_frames_to_bmp(
             raise RuntimeError("BMP conversion canceled by user.")
 
         bmp_path = bmp_dir / (png_path.stem + ".bmp")
-        _convert_png_to_bmp(png_path, bmp_path, threshold, use_thinning)
+        _convert_png_to_bmp(png_path, bmp_path, threshold, use_thinning, engine=engine)
 
         if frame_callback:
             frame_callback(idx, total, bmp_path)
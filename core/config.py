@@ -36,6 +36,12 @@ FFMPEG_PATH = _tool_path(
     "ffmpeg",
 )
 
+FFPROBE_PATH = _tool_path(
+    "LPIP_FFPROBE",
+    r"C:\ffmpeg-7.1-essentials_build\bin\ffprobe.exe",
+    "ffprobe",
+)
+
 POTRACE_PATH = _tool_path(
     "LPIP_POTRACE",
     r"C:\potrace-1.16.win64\potrace.exe",
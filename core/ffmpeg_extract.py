@@ -1,10 +1,187 @@
 # core/ffmpeg_extract.py
 from __future__ import annotations
 
+import os
+import struct
 import subprocess
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
 
-from .config import FFMPEG_PATH, PROJECTS_ROOT
+from .config import FFMPEG_PATH, FFPROBE_PATH, PROJECTS_ROOT
+
+# niveau zlib de l'encodeur PNG FFmpeg (0-9) : 1 = le plus rapide qui compresse encore
+_PNG_COMPRESSION_LEVEL = 1
+
+
+def probe_duration_s(input_video: Path) -> Optional[float]:
+    """
+    Durée de la vidéo (secondes) via ffprobe.
+    Best-effort : None si ffprobe est absent ou ne sait pas répondre.
+    """
+    cmd = [
+        str(FFPROBE_PATH),
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        os.fspath(input_video),
+    ]
+    try:
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        duration = float(out.strip())
+    except Exception:
+        return None
+    return duration if duration > 0 else None
+
+
+def _parse_rate(value: str) -> Optional[float]:
+    # "24000/1001" / "25/1" / "25" -> float ; "0/0" (inconnu) -> None
+    num, _, den = value.strip().partition("/")
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return rate if rate > 0 else None
+
+
+@lru_cache(maxsize=32)
+def _probe_frame_rate_cached(path: str, _mtime_ns: int, _size: int) -> Optional[float]:
+    cmd = [
+        str(FFPROBE_PATH),
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=avg_frame_rate,r_frame_rate",
+        "-of",
+        "default=noprint_wrappers=1",
+        path,
+    ]
+    try:
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    except Exception:
+        return None
+
+    rates = dict(line.partition("=")[::2] for line in out.splitlines() if "=" in line)
+    # avg_frame_rate (réel, y compris VFR) en priorité, r_frame_rate sinon
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        rate = _parse_rate(rates.get(key, ""))
+        if rate is not None:
+            return rate
+    return None
+
+
+def probe_frame_rate(input_video: Path) -> Optional[float]:
+    """
+    Cadence native (images/s) du 1er flux vidéo via ffprobe.
+    Best-effort : None si inconnue. Mise en cache par (chemin, mtime, taille).
+    """
+    try:
+        st = os.stat(input_video)
+    except OSError:
+        return None
+    return _probe_frame_rate_cached(os.fspath(input_video), st.st_mtime_ns, st.st_size)
+
+
+def _build_vf(fps: int, scale: float | None) -> str:
+    vf = f"fps={int(fps)}"
+    if scale is not None and float(scale) > 1.0:
+        vf = f"{vf},scale=iw*{float(scale)}:ih*{float(scale)}:flags=lanczos"
+    return vf
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _read_png(stream: BinaryIO) -> Optional[bytes]:
+    """
+    Lit un PNG complet depuis un flux image2pipe (signature + chunks jusqu'à IEND).
+    None en fin de flux ; ValueError si le flux est tronqué ou n'est pas du PNG.
+    """
+    sig = stream.read(8)
+    if not sig:
+        return None
+    if sig != _PNG_SIGNATURE:
+        raise ValueError("Flux FFmpeg inattendu (signature PNG absente).")
+
+    parts = [sig]
+    while True:
+        head = stream.read(8)
+        if len(head) != 8:
+            raise ValueError("Flux PNG tronqué.")
+        length, ctype = struct.unpack(">I4s", head)
+        body = stream.read(length + 4)  # données + CRC
+        if len(body) != length + 4:
+            raise ValueError("Flux PNG tronqué.")
+        parts += (head, body)
+        if ctype == b"IEND":
+            return b"".join(parts)
+
+
+def iter_frames(
+    input_video: Path,
+    fps: int,
+    *,
+    max_frames: int = 0,  # 0 = toutes
+    scale: float | None = None,
+    hwaccel: str | None = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Variante sans disque de extract_frames : FFmpeg encode les frames en PNG
+    sur stdout (image2pipe) et on rend (index 1-based, octets PNG) au fil de l'eau.
+
+    PNG (sans perte) plutôt que MJPEG : le seuillage bitmap reste identique
+    à celui des frames écrites sur disque.
+    """
+    input_video = Path(input_video)
+    if not input_video.exists():
+        raise FileNotFoundError(f"Vidéo introuvable: {input_video}")
+
+    cmd: list[str] = [
+        str(FFMPEG_PATH),
+        "-hide_banner",
+        "-loglevel",
+        "error",
+    ]
+
+    if hwaccel:
+        cmd += ["-hwaccel", str(hwaccel)]
+
+    cmd += ["-i", os.fspath(input_video), "-vf", _build_vf(fps, scale)]
+
+    if int(max_frames) > 0:
+        cmd += ["-frames:v", str(int(max_frames))]
+
+    cmd += [
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "png",
+        "-compression_level",
+        str(_PNG_COMPRESSION_LEVEL),
+        "pipe:1",
+    ]
+
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        try:
+            idx = 0
+            while (data := _read_png(proc.stdout)) is not None:
+                if cancel_cb and cancel_cb():
+                    raise RuntimeError("FFmpeg extraction canceled by user.")
+                idx += 1
+                yield idx, data
+        except BaseException:
+            # annulation / erreur / consommateur qui s'arrête : on coupe FFmpeg
+            proc.terminate()
+            raise
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
 
 
 def extract_frames(
@@ -14,6 +191,9 @@ def extract_frames(
     *,
     max_frames: int = 0,  # 0 = toutes
     scale: float | None = None,
+    hwaccel: str | None = None,
+    frame_callback: Optional[Callable[[int, Optional[int], Path], None]] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
 ) -> Path:
     """
     Extrait les frames PNG de input_video dans:
@@ -21,6 +201,12 @@ def extract_frames(
 
     - fps: échantillonnage temporel (fps=25 -> 25 images/seconde)
     - max_frames: 0 = toutes, sinon limite le nombre de frames extraites
+    - hwaccel: décodage matériel FFmpeg ("auto", "cuda", "videotoolbox", "vaapi"...),
+      None = logiciel ; "auto" retombe seul sur le logiciel, un accélérateur
+      explicite indisponible ("Device setup failed") est réessayé une fois sans
+    - frame_callback(n, total, out_dir): appelé au fil de l'extraction
+      (FFmpeg -progress), total estimé via ffprobe (None si inconnu)
+    - cancel_cb: interrompt FFmpeg en cours d'extraction
     """
     input_video = Path(input_video)
     if not input_video.exists():
@@ -31,9 +217,7 @@ def extract_frames(
 
     out_pattern = out_dir / "frame_%04d.png"
 
-    vf = f"fps={int(fps)}"
-    if scale is not None and float(scale) > 1.0:
-        vf = f"{vf},scale=iw*{float(scale)}:ih*{float(scale)}:flags=lanczos"
+    vf = _build_vf(fps, scale)
 
     cmd: list[str] = [
         str(FFMPEG_PATH),
@@ -41,8 +225,14 @@ def extract_frames(
         "-hide_banner",
         "-loglevel",
         "error",
+    ]
+
+    if hwaccel:
+        cmd += ["-hwaccel", str(hwaccel)]
+
+    cmd += [
         "-i",
-        str(input_video),
+        os.fspath(input_video),
         "-vf",
         vf,
     ]
@@ -50,7 +240,49 @@ def extract_frames(
     if int(max_frames) > 0:
         cmd += ["-frames:v", str(int(max_frames))]
 
-    cmd += [str(out_pattern)]
+    # PNG sans perte mais deflate rapide : les frames sont relues une seule fois
+    cmd += ["-compression_level", str(_PNG_COMPRESSION_LEVEL)]
+
+    # avancement machine-lisible sur stdout ("frame=N" toutes les ~0.5 s)
+    cmd += ["-progress", "pipe:1", "-nostats", str(out_pattern)]
+
+    total: Optional[int] = None
+    if frame_callback is not None:
+        duration = probe_duration_s(input_video)
+        if duration is not None:
+            total = max(1, int(round(duration * int(fps))))
+        if int(max_frames) > 0:
+            total = min(total, int(max_frames)) if total is not None else int(max_frames)
+
+    last = 0
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+        try:
+            for line in proc.stdout:
+                if cancel_cb and cancel_cb():
+                    raise RuntimeError("FFmpeg extraction canceled by user.")
+
+                key, _, value = line.strip().partition("=")
+                if key == "frame" and value.isdigit() and int(value) > last:
+                    last = int(value)
+                    if frame_callback:
+                        frame_callback(last, total, out_dir)
+        except BaseException:
+            # annulation / erreur côté Python : on n'attend pas la fin de FFmpeg
+            proc.terminate()
+            raise
 
-    subprocess.run(cmd, check=True)
+    if proc.returncode != 0:
+        if hwaccel and str(hwaccel) != "auto" and last == 0:
+            # échec avant la 1re frame avec un accélérateur explicite : décodage logiciel
+            return extract_frames(
+                input_video,
+                project_name,
+                fps,
+                max_frames=max_frames,
+                scale=scale,
+                hwaccel=None,
+                frame_callback=frame_callback,
+                cancel_cb=cancel_cb,
+            )
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
     return out_dir
@@ -0,0 +1,66 @@
+# core/frame_cache.py
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Union
+
+
+def cache_dir_for(project_root: Path, stage: str) -> Path:
+    """Dossier de cache d'un stage : projects/<project>/.cache/<stage>."""
+    return project_root / ".cache" / stage
+
+
+def content_key(*parts: Union[bytes, str]) -> str:
+    """
+    Clé de cache = blake2b (16 octets) du contenu + paramètres.
+    Chaque partie est préfixée par sa longueur (pas de collision par concaténation).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def get_or_compute(cache_dir: Path, key: str, compute: Callable[[], bytes]) -> bytes:
+    """
+    Renvoie <cache_dir>/<key>.bin s'il existe, sinon calcule + enregistre.
+    Best-effort : une erreur disque ne casse jamais le calcul.
+    """
+    path = cache_dir / f"{key}.bin"
+    try:
+        return path.read_bytes()
+    except OSError:
+        pass
+
+    data = compute()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return data
+
+
+def prune(cache_dir: Path, keep: Iterable[str]) -> None:
+    """
+    Supprime les entrées de <cache_dir> absentes de keep (clés du dernier
+    calcul complet) : le cache ne grossit pas d'un run à l'autre.
+    Best-effort, comme get_or_compute.
+    """
+    keep_names = {f"{key}.bin" for key in keep}
+    try:
+        with os.scandir(cache_dir) as it:
+            stale = [e.path for e in it if e.name not in keep_names]
+    except OSError:
+        return
+    for path in stale:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -1,15 +1,18 @@
 # core/ilda_export.py
 from __future__ import annotations
 
+import io
 import json
 import re
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, List, Optional, Set, Tuple
 import xml.etree.ElementTree as ET
 
+import numpy as np
 from svgpathtools import Line, parse_path
 
 from .config import PROJECTS_ROOT
+from .frame_cache import cache_dir_for, content_key, get_or_compute, prune
 from .ilda_profiles import get_ilda_profile
 from .ilda_writer import IldaFrame, IldaHeader, IldaPoint, write_ilda_file
 
@@ -37,63 +40,137 @@ def _path_to_polyline(path, samples: int = 64) -> List[Tuple[float, float]]:
     return pts
 
 
-def _compute_global_normalization(svg_files: List[Path]) -> Tuple[Tuple[float, float], float]:
+# (rgb data-rgb ou None, polyligne (N, 2) float64 en unités SVG) par <path>
+SvgPolylines = List[Tuple[Optional[Tuple[int, int, int]], np.ndarray]]
+
+# à incrémenter si l'échantillonnage des chemins change (invalide le cache .cache/ilda)
+_POLY_CACHE_VERSION = "1"
+
+
+def _svg_polylines(svg_bytes: bytes) -> SvgPolylines:
     """
-    Normalisation globale : centre + scale communs à toutes les frames.
+    Parse un SVG une seule fois : polylignes échantillonnées de chaque <path>.
+    Lève ET.ParseError si le SVG est invalide.
     """
-    all_pts: List[Tuple[float, float]] = []
+    root = ET.fromstring(svg_bytes)
+    out: SvgPolylines = []
+    for elem in root.iter():
+        if not elem.tag.lower().endswith("path"):
+            continue
+        d = elem.get("d")
+        if not d:
+            continue
+        try:
+            sp = parse_path(d)
+        except Exception:
+            continue
+        pts = np.asarray(_path_to_polyline(sp), dtype=np.float64).reshape(-1, 2)
+        out.append((_parse_data_rgb(elem.get("data-rgb")), pts))
+    return out
 
+
+def _pack_polylines(polys: SvgPolylines) -> bytes:
+    lens = np.array([len(pts) for _, pts in polys], dtype=np.int64)
+    pts = np.concatenate([pts for _, pts in polys]) if polys else np.empty((0, 2), dtype=np.float64)
+    rgb = np.array([c if c is not None else (-1, -1, -1) for c, _ in polys], dtype=np.int16).reshape(-1, 3)
+    buf = io.BytesIO()
+    np.savez(buf, pts=pts, lens=lens, rgb=rgb)
+    return buf.getvalue()
+
+
+def _unpack_polylines(data: bytes) -> SvgPolylines:
+    with np.load(io.BytesIO(data), allow_pickle=False) as z:
+        pts, lens, rgb = z["pts"], z["lens"], z["rgb"]
+    chunks = np.split(pts, np.cumsum(lens)[:-1]) if len(lens) else []
+    return [
+        (None if c[0] < 0 else (int(c[0]), int(c[1]), int(c[2])), chunk)
+        for c, chunk in zip(rgb.tolist(), chunks)
+    ]
+
+
+def _load_svg_polylines(
+    svg_path: Path,
+    cache_dir: Optional[Path],
+    used_keys: Optional[Set[str]] = None,
+) -> SvgPolylines:
+    """
+    Polylignes d'un SVG, via le cache par contenu si cache_dir est fourni :
+    un SVG inchangé n'est pas re-parsé d'un export à l'autre (réglages ILDA
+    seuls modifiés). Les réglages n'entrent pas dans la clé : ils ne
+    s'appliquent qu'après, à la normalisation.
+    used_keys : reçoit la clé de cache utilisée (nettoyage après l'export).
+    """
+    data = svg_path.read_bytes()
+    if cache_dir is None:
+        return _svg_polylines(data)
+
+    key = content_key(_POLY_CACHE_VERSION, data)
+    if used_keys is not None:
+        used_keys.add(key)
+    packed = get_or_compute(cache_dir, key, lambda: _pack_polylines(_svg_polylines(data)))
+    try:
+        return _unpack_polylines(packed)
+    except Exception:
+        # entrée de cache corrompue : on recalcule sans elle
+        return _svg_polylines(data)
+
+
+def _load_all_polylines(
+    svg_files: List[Path],
+    cache_dir: Optional[Path],
+    used_keys: Optional[Set[str]] = None,
+) -> List[Optional[SvgPolylines]]:
+    # None = SVG illisible : ignoré par la normalisation, erreur levée à l'export de la frame
+    frames: List[Optional[SvgPolylines]] = []
     for svg_path in svg_files:
         try:
-            tree = ET.parse(svg_path)
-            root = tree.getroot()
+            frames.append(_load_svg_polylines(svg_path, cache_dir, used_keys))
         except Exception:
-            continue
+            frames.append(None)
+    return frames
 
-        for elem in root.iter():
-            if not elem.tag.lower().endswith("path"):
-                continue
-            d = elem.get("d")
-            if not d:
-                continue
-            try:
-                sp = parse_path(d)
-            except Exception:
-                continue
-            all_pts.extend(_path_to_polyline(sp))
 
-    if not all_pts:
+def _compute_global_normalization(frames: List[Optional[SvgPolylines]]) -> Tuple[Tuple[float, float], float]:
+    """
+    Normalisation globale : centre + scale communs à toutes les frames.
+    """
+    chunks = [pts for polys in frames if polys for _, pts in polys if len(pts)]
+
+    if not chunks:
         # fallback neutre
         return (0.0, 0.0), 1.0
 
-    xs = [p[0] for p in all_pts]
-    ys = [p[1] for p in all_pts]
-    cx = (min(xs) + max(xs)) / 2.0
-    cy = (min(ys) + max(ys)) / 2.0
-    span = max(max(xs) - min(xs), max(ys) - min(ys), 1e-6)
+    all_pts = np.concatenate(chunks)
+    xmin, ymin = (float(v) for v in all_pts.min(axis=0))
+    xmax, ymax = (float(v) for v in all_pts.max(axis=0))
+    cx = (xmin + xmax) / 2.0
+    cy = (ymin + ymax) / 2.0
+    span = max(xmax - xmin, ymax - ymin, 1e-6)
     scale = ILDA_SPAN / span
     return (cx, cy), scale
 
 
 def _normalize_points(
-    pts: List[Tuple[float, float]],
+    pts: np.ndarray | List[Tuple[float, float]],
     *,
     center: Tuple[float, float],
     scale: float,
     fill_ratio: float,
 ) -> List[Tuple[int, int]]:
+    if len(pts) == 0:
+        return []
+
     cx, cy = center
-    out: List[Tuple[int, int]] = []
     s = scale * float(fill_ratio)
 
-    for x, y in pts:
-        xn = int(round((x - cx) * s))
-        yn = int(round((y - cy) * s))
-        xn = max(ILDA_MIN, min(ILDA_MAX, xn))
-        yn = max(ILDA_MIN, min(ILDA_MAX, yn))
-        out.append((xn, yn))
-
-    return out
+    # Une seule passe vectorisée (round half-even comme round(), puis clamp) ;
+    # copie : pts peut venir du cache de polylignes
+    arr = np.array(pts, dtype=np.float64)
+    arr -= (cx, cy)
+    arr *= s
+    np.rint(arr, out=arr)
+    np.clip(arr, ILDA_MIN, ILDA_MAX, out=arr)
+    return [tuple(p) for p in arr.astype(np.int64).tolist()]
 
 
 _RGB_RE = re.compile(r"^\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*$")
@@ -122,11 +199,16 @@ def export_project_to_ilda(
     swap_rb: bool = False,
     check_cancel: Optional[Callable[[], bool]] = None,
     report_progress: Optional[Callable[[int, int], None]] = None,
+    use_cache: bool = True,
 ) -> Path:
     """
     Compute ILDA from SVGs.
     - classic: indexed (format 0)
     - arcade: truecolor (format 5) via data-rgb sur les <path>
+    - use_cache: polylignes par SVG mises en cache (projects/<project>/.cache/ilda),
+      indexées par contenu ; un re-export ne re-parse que les SVG modifiés.
+      Après un export réussi, les entrées non utilisées (SVG d'un ancien run
+      Potrace) sont supprimées : le cache reste à la taille du projet
     """
     project_root = PROJECTS_ROOT / project_name
     svg_dir = project_root / "svg"
@@ -135,6 +217,8 @@ def export_project_to_ilda(
 
     mode = (mode or "classic").lower()
     profile = get_ilda_profile(mode)
+    cache_dir = cache_dir_for(project_root, "ilda") if use_cache else None
+    used_keys: Set[str] = set()
 
     # ------------------------------------------------------------------
     # Arcade : on s'appuie sur le manifest pour la liste des frames
@@ -152,7 +236,8 @@ def export_project_to_ilda(
         if not svg_files:
             raise RuntimeError("Aucun SVG arcade trouvé (step potrace arcade).")
 
-        center, scale = _compute_global_normalization(svg_files)
+        frames_polys = _load_all_polylines(svg_files, cache_dir, used_keys)
+        center, scale = _compute_global_normalization(frames_polys)
 
         frames_out: List[IldaFrame] = []
         total = len(svg_files)
@@ -161,29 +246,17 @@ def export_project_to_ilda(
             if check_cancel and check_cancel():
                 raise RuntimeError("ILDA computation canceled")
 
-            tree = ET.parse(svg_path)
-            root = tree.getroot()
+            polys = frames_polys[idx]
+            if polys is None:
+                polys = _load_svg_polylines(svg_path, None)  # relève l'erreur de parse
 
             pts_out: List[IldaPoint] = []
 
-            for elem in root.iter():
-                if not elem.tag.lower().endswith("path"):
-                    continue
-
-                d = elem.get("d")
-                if not d:
-                    continue
-
-                rgb = _parse_data_rgb(elem.get("data-rgb")) or (255, 255, 255)
+            for rgb_attr, poly in polys:
+                rgb = rgb_attr or (255, 255, 255)
                 if swap_rb:
                     rgb = (rgb[2], rgb[1], rgb[0])
 
-                try:
-                    sp = parse_path(d)
-                except Exception:
-                    continue
-
-                poly = _path_to_polyline(sp)
                 coords = _normalize_points(poly, center=center, scale=scale, fill_ratio=fill_ratio)
                 if not coords:
                     continue
@@ -203,6 +276,8 @@ def export_project_to_ilda(
                 report_progress(idx, total)
 
         write_ilda_file(out_path, frames_out, mode="truecolor")
+        if cache_dir is not None:
+            prune(cache_dir, used_keys)
         return out_path
 
     # ------------------------------------------------------------------
@@ -212,7 +287,8 @@ def export_project_to_ilda(
     if not svg_files:
         raise RuntimeError("No SVG found for ILDA computation.")
 
-    center, scale = _compute_global_normalization(svg_files)
+    frames_polys = _load_all_polylines(svg_files, cache_dir, used_keys)
+    center, scale = _compute_global_normalization(frames_polys)
 
     frames_out: List[IldaFrame] = []
     total = len(svg_files)
@@ -221,24 +297,13 @@ def export_project_to_ilda(
         if check_cancel and check_cancel():
             raise RuntimeError("ILDA computation canceled")
 
-        tree = ET.parse(svg_path)
-        root = tree.getroot()
+        polys = frames_polys[idx]
+        if polys is None:
+            polys = _load_svg_polylines(svg_path, None)  # relève l'erreur de parse
 
         pts_out: List[IldaPoint] = []
 
-        for elem in root.iter():
-            if not elem.tag.lower().endswith("path"):
-                continue
-            d = elem.get("d")
-            if not d:
-                continue
-
-            try:
-                sp = parse_path(d)
-            except Exception:
-                continue
-
-            poly = _path_to_polyline(sp)
+        for _rgb, poly in polys:
             coords = _normalize_points(poly, center=center, scale=scale, fill_ratio=fill_ratio)
             if not coords:
                 continue
@@ -258,4 +323,6 @@ def export_project_to_ilda(
             report_progress(idx, total)
 
     write_ilda_file(out_path, frames_out, mode="indexed")
+    if cache_dir is not None:
+        prune(cache_dir, used_keys)
     return out_path
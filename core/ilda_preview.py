@@ -30,6 +30,9 @@ import struct
 
 from PIL import Image, ImageDraw
 
+# Same 32-byte header model as the writer (one definition for both sides).
+from .ilda_writer import IldaHeader
+
 
 # -----------------------------
 # Palettes
@@ -134,17 +137,6 @@ def get_palette_by_name(name: str) -> List[RGB]:
 # ILDA parsing
 # -----------------------------
 
-@dataclass(frozen=True)
-class IldaHeader:
-    format_code: int
-    frame_name: str
-    company_name: str
-    num_records: int
-    frame_number: int
-    total_frames: int
-    scanner_head: int
-
-
 @dataclass
 class IldaFrame:
     header: IldaHeader
@@ -341,11 +333,11 @@ def load_ilda_frames(
         payload = data[payload_start:payload_end]
 
         if fmt == 2:
-            pal = [(0, 0, 0)] * 256
+            # One bulk slice of the r,g,b records instead of 256 small reads.
             n = min(hdr.num_records, 256)
-            for i in range(n):
-                r, g, b = payload[i * 3:(i + 1) * 3]
-                pal[i] = (int(r), int(g), int(b))
+            rgb = payload[:n * 3]
+            pal = list(zip(rgb[0::3], rgb[1::3], rgb[2::3]))
+            pal += [(0, 0, 0)] * (256 - n)
             embedded_palette = pal
         elif fmt in (0, 1, 4, 5):
             pts = _parse_records(fmt, payload, hdr.num_records)
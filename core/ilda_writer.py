@@ -21,17 +21,27 @@ The compatibility layer is here to avoid regressions when other modules evolve.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, List, Optional, Sequence, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+import os
 import struct
 from pathlib import Path
 
+import numpy as np
+
+# zstandard est optionnel : seulement pour write_ilda_file_zst
+try:
+    import zstandard
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
 
 # ---------------------------
 # Data structures
 # ---------------------------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IldaHeader:
     """
     ILDA 32-byte header.
@@ -57,7 +67,7 @@ class IldaHeader:
     scanner_head: int = 0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IldaPoint:
     """
     A logical point used by the exporter.
@@ -157,51 +167,140 @@ class IldaFrame:
     def record_count(self) -> int:
         return int(self.header.num_records)
 
+    def to_array(self, truecolor: Optional[bool] = None) -> "IldaFrameArray":
+        """
+        Convert the points to column storage (IldaFrameArray).
+
+        truecolor=None infers it from the points (any explicit r/g/b);
+        missing r/g/b then default to 255, like the writer does.
+        """
+        pts = self.points
+        if truecolor is None:
+            truecolor = _infer_truecolor(pts)
+
+        n = len(pts)
+        if truecolor:
+            flat = np.fromiter(
+                (
+                    v
+                    for p in pts
+                    for v in (
+                        p.x, p.y, p.z, p.blanked, p.color_index,
+                        255 if p.r is None else p.r,
+                        255 if p.g is None else p.g,
+                        255 if p.b is None else p.b,
+                    )
+                ),
+                dtype=np.int64,
+                count=n * 8,
+            )
+            cols = flat.reshape(n, 8)
+        else:
+            flat = np.fromiter(
+                (v for p in pts for v in (p.x, p.y, p.z, p.blanked, p.color_index)),
+                dtype=np.int64,
+                count=n * 5,
+            )
+            cols = flat.reshape(n, 5)
+
+        return IldaFrameArray(
+            x=cols[:, 0],
+            y=cols[:, 1],
+            z=cols[:, 2],
+            blanked=cols[:, 3] != 0,
+            color_index=cols[:, 4],
+            r=cols[:, 5] if truecolor else None,
+            g=cols[:, 6] if truecolor else None,
+            b=cols[:, 7] if truecolor else None,
+            header=self.header,
+        )
+
+
+@dataclass(slots=True)
+class IldaFrameArray:
+    """
+    Column-oriented (SoA) variant of IldaFrame: one NumPy array per field
+    instead of one IldaPoint object per point.
+
+    Columns (same length):
+      - x, y, (optional z): coordinates, clamped to int16 when written
+      - blanked: bool
+      - color_index: indexed color (formats 0/1), 0 when omitted
+      - r, g, b: truecolor (formats 4/5), 255 when omitted
+
+    write_ilda_file accepts it wherever an IldaFrame is accepted; only
+    header.frame_name / company_name / scanner_head are used by the writer.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    blanked: np.ndarray
+    z: Optional[np.ndarray] = None
+    color_index: Optional[np.ndarray] = None
+    r: Optional[np.ndarray] = None
+    g: Optional[np.ndarray] = None
+    b: Optional[np.ndarray] = None
+    header: IldaHeader = field(default_factory=lambda: IldaHeader(format_code=0))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def has_rgb(self) -> bool:
+        return self.r is not None or self.g is not None or self.b is not None
+
 
 # ---------------------------
 # Helpers
 # ---------------------------
 
-def _clip_i16(v: int) -> int:
-    if v < -32768:
-        return -32768
-    if v > 32767:
-        return 32767
-    return int(v)
-
 def _clip_u8(v: int) -> int:
     if v < 0:
         return 0
     if v > 255:
         return 255
-    return int(v)
+    return v
 
+# Output buffer: large enough that a typical frame is one write() syscall.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Latin-1 byte -> ASCII byte ('?' for everything above 0x7F).
+_ASCII_TABLE = bytes(c if c < 128 else ord("?") for c in range(256))
+
+
+# Animations reuse the same few names/companies for every frame.
+@lru_cache(maxsize=256)
 def _encode_name8(s: str) -> bytes:
     # Most tools accept ASCII; we replace unknown chars.
-    b = (s or "").encode("ascii", errors="replace")
-    b = b[:8]
-    return b.ljust(8, b"\x00")
-
-def _status_byte(blanked: bool, last_point: bool) -> int:
-    # ILDA status byte:
-    # bit 6 (0x40): blanked (laser off)
-    # bit 7 (0x80): last point
-    st = 0x40 if blanked else 0x00
-    if last_point:
-        st |= 0x80
-    return st
-
-def _write_header(f, h: IldaHeader) -> None:
-    f.write(b"ILDA")
-    f.write(b"\x00\x00\x00")
-    f.write(struct.pack(">B", _clip_u8(h.format_code)))
-    f.write(_encode_name8(h.frame_name))
-    f.write(_encode_name8(h.company_name))
-    f.write(struct.pack(">H", int(h.num_records) & 0xFFFF))
-    f.write(struct.pack(">H", int(h.frame_number) & 0xFFFF))
-    f.write(struct.pack(">H", int(h.total_frames) & 0xFFFF))
-    f.write(struct.pack(">B", _clip_u8(h.scanner_head)))
-    f.write(b"\x00")  # reserved
+    # latin-1 + translate is cheaper than the ascii codec's "replace" path.
+    b = (s or "").encode("latin-1", errors="replace").translate(_ASCII_TABLE)
+    return b[:8].ljust(8, b"\x00")
+
+# Header layout: "ILDA", 3 reserved, format, name[8], company[8],
+# num_records, frame_number, total_frames, scanner_head, reserved.
+_HDR_STRUCT = struct.Struct(">4s3sB8s8sHHHBB")
+# num_records + frame_number, at offset 24 of a header.
+_HDR_COUNTERS_STRUCT = struct.Struct(">HH")
+
+
+def _pack_header_into(buf, offset: int, h: IldaHeader) -> None:
+    _HDR_STRUCT.pack_into(
+        buf,
+        offset,
+        b"ILDA",
+        b"\x00\x00\x00",
+        _clip_u8(h.format_code),
+        _encode_name8(h.frame_name),
+        _encode_name8(h.company_name),
+        h.num_records & 0xFFFF,
+        h.frame_number & 0xFFFF,
+        h.total_frames & 0xFFFF,
+        _clip_u8(h.scanner_head),
+        0,  # reserved
+    )
+
+
+# EOF header: format 0, empty names, 0 records (always the same 32 bytes).
+_EOF_HEADER = _HDR_STRUCT.pack(b"ILDA", b"\x00\x00\x00", 0, b"", b"", 0, 0, 0, 0, 0)
 
 
 def _infer_truecolor(points: Sequence[IldaPoint]) -> bool:
@@ -212,120 +311,372 @@ def _infer_truecolor(points: Sequence[IldaPoint]) -> bool:
     return False
 
 
+# Point record layouts (big-endian), one structured dtype per format.
+# A frame is packed by filling one array and dumping it with tobytes().
+_POINT_DTYPES = {
+    0: np.dtype([("x", ">i2"), ("y", ">i2"), ("z", ">i2"), ("status", "u1"), ("color_index", "u1")]),
+    1: np.dtype([("x", ">i2"), ("y", ">i2"), ("status", "u1"), ("color_index", "u1")]),
+    4: np.dtype([("x", ">i2"), ("y", ">i2"), ("z", ">i2"), ("status", "u1"),
+                 ("r", "u1"), ("g", "u1"), ("b", "u1")]),
+    5: np.dtype([("x", ">i2"), ("y", ">i2"), ("status", "u1"),
+                 ("r", "u1"), ("g", "u1"), ("b", "u1")]),
+}
+
+
+def _check_format(fmt: int) -> None:
+    if fmt not in _POINT_DTYPES:
+        raise ValueError(f"Unsupported ILDA format code for writer: {fmt}")
+
+
+def _fill_records(rec: np.ndarray, fmt: int, arr: IldaFrameArray) -> None:
+    """
+    Fill the (zeroed) structured record array of one frame from its columns.
+
+    Clamping, status bits and big-endian conversion are done column-wise.
+    """
+    if not len(rec):
+        return
+
+    rec["x"] = np.clip(arr.x, -32768, 32767)
+    rec["y"] = np.clip(arr.y, -32768, 32767)
+    if "z" in rec.dtype.names and arr.z is not None:
+        rec["z"] = np.clip(arr.z, -32768, 32767)
+
+    if fmt in (4, 5):
+        for name in ("r", "g", "b"):
+            col = getattr(arr, name)
+            rec[name] = 255 if col is None else np.clip(col, 0, 255)
+    elif arr.color_index is not None:
+        rec["color_index"] = np.clip(arr.color_index, 0, 255)
+
+    # bit 6 (0x40): blanked, bit 7 (0x80): last point
+    # (written in place through the field view, no temporary column)
+    status = rec["status"]
+    status[np.asarray(arr.blanked, dtype=bool)] = 0x40
+    status[-1] |= 0x80
+
+
+def _pack_frame_into(buf, offset: int, h: IldaHeader, fmt: int, arr: IldaFrameArray) -> int:
+    """
+    Pack one frame (header + point records) into buf at offset.
+
+    The records are filled through a NumPy view of buf, so nothing is copied.
+    Returns the offset just after the frame.
+    """
+    _pack_header_into(buf, offset, h)
+    return _pack_records_into(buf, offset + _HDR_STRUCT.size, fmt, arr)
+
+
+def _pack_records_into(buf, offset: int, fmt: int, arr: IldaFrameArray) -> int:
+    n = len(arr)
+    dtype = _POINT_DTYPES[fmt]
+    _fill_records(np.frombuffer(buf, dtype=dtype, count=n, offset=offset), fmt, arr)
+    return offset + n * dtype.itemsize
+
+
 # ---------------------------
 # Public writer API
 # ---------------------------
 
+def _resolve_file_format(mode: str, force_format: Optional[int]) -> Optional[int]:
+    """
+    Format code shared by every frame, or None when it must be inferred
+    per frame (mode="auto").
+    """
+    mode_key = (mode or "auto").lower()
+    if force_format is not None:
+        file_fmt: Optional[int] = int(force_format)
+    elif mode_key == "truecolor":
+        file_fmt = 5
+    elif mode_key == "indexed":
+        file_fmt = 0
+    else:
+        file_fmt = None
+    if file_fmt is not None:
+        _check_format(file_fmt)
+    return file_fmt
+
+
+def _resolve_frame(
+    frame: Union[IldaFrame, IldaFrameArray],
+    file_fmt: Optional[int],
+) -> Tuple[IldaHeader, int, IldaFrameArray]:
+    """
+    Format code and column storage of one frame: (source header, format, columns).
+    """
+    arr = frame if isinstance(frame, IldaFrameArray) else None
+    if file_fmt is not None:
+        fmt = file_fmt
+    elif arr is not None:
+        fmt = 5 if arr.has_rgb else 0
+    else:
+        fmt = 5 if _infer_truecolor(frame.points) else 0
+    if arr is None:
+        # List-based frames go through the same column path.
+        arr = frame.to_array(truecolor=fmt in (4, 5))
+    return frame.header, fmt, arr
+
+
+def _frame_size(fmt: int, arr: IldaFrameArray) -> int:
+    return _HDR_STRUCT.size + len(arr) * _POINT_DTYPES[fmt].itemsize
+
+
+def _frame_header(h0: IldaHeader, fmt: int, num_records: int, idx: int, total_frames: int) -> IldaHeader:
+    return IldaHeader(
+        format_code=fmt,
+        frame_name=h0.frame_name,
+        company_name=h0.company_name,
+        num_records=num_records,
+        frame_number=idx,
+        total_frames=total_frames,   # <-- FIXED
+        scanner_head=h0.scanner_head,
+    )
+
+
+def _shared_header_template(
+    plan: Sequence[Tuple[IldaHeader, int, IldaFrameArray]],
+    total_frames: int,
+) -> Optional[bytes]:
+    """
+    Header bytes common to all frames (name / num_records / frame_number are
+    rewritten per frame), or None when frames differ in format, company or
+    scanner head.
+    """
+    if not plan:
+        return None
+    h_first, fmt_first, _ = plan[0]
+    # frame_name is not part of the key: callers name each frame ("F0000", ...)
+    key = (fmt_first, h_first.company_name, h_first.scanner_head)
+    for h0, fmt, _ in plan:
+        if (fmt, h0.company_name, h0.scanner_head) != key:
+            return None
+    tpl = bytearray(_HDR_STRUCT.size)
+    _pack_header_into(tpl, 0, _frame_header(h_first, fmt_first, 0, 0, total_frames))
+    return bytes(tpl)
+
+
+def _build_ilda_bytes(
+    frames: Sequence[Union[IldaFrame, IldaFrameArray]],
+    *,
+    mode: str,
+    force_format: Optional[int],
+    include_eof_header: bool,
+    alloc: Callable[[int], Any] = bytearray,
+) -> Any:
+    """
+    Pack a whole ILDA file into one buffer (see write_ilda_file).
+
+    alloc(size) returns the zero-filled, writable buffer to pack into
+    (a bytearray by default, a file mapping for write_ilda_file_memmap).
+    """
+    # Recommended: total_frames = number of frames (not last index)
+    total_frames = len(frames)
+
+    # Decide format code once when the arguments already settle it;
+    # only "auto" needs to scan the points of each frame.
+    file_fmt = _resolve_file_format(mode, force_format)
+
+    # Resolve format and columns of every frame first: the output size is
+    # then known and the file is packed into one preallocated buffer.
+    plan = [_resolve_frame(frame, file_fmt) for frame in frames]
+
+    size = sum(_frame_size(fmt, arr) for _, fmt, arr in plan)
+    if include_eof_header:
+        size += _HDR_STRUCT.size
+    buf = alloc(size)
+
+    # Usual case: every frame has the same format, company and head.
+    # The header is then packed once; only its name and counters change per frame.
+    tpl = _shared_header_template(plan, total_frames)
+
+    offset = 0
+    mv = memoryview(buf)
+    for idx, (h0, fmt, arr) in enumerate(plan):
+        if tpl is not None:
+            mv[offset:offset + _HDR_STRUCT.size] = tpl
+            mv[offset + 8:offset + 16] = _encode_name8(h0.frame_name)
+            _HDR_COUNTERS_STRUCT.pack_into(buf, offset + 24, len(arr) & 0xFFFF, idx & 0xFFFF)
+            offset = _pack_records_into(buf, offset + _HDR_STRUCT.size, fmt, arr)
+        else:
+            h = _frame_header(h0, fmt, len(arr), idx, total_frames)
+            offset = _pack_frame_into(buf, offset, h, fmt, arr)
+    mv.release()
+
+    # Optional EOF header (some readers like it, others treat it as a frame)
+    if include_eof_header:
+        memoryview(buf)[offset:] = _EOF_HEADER
+
+    return buf
+
+
+def _write_all(out_path: Path, buf: bytearray) -> None:
+    """
+    Dump a fully packed file with raw os.write() calls on a file descriptor
+    (no buffered I/O layer in between: the data is already one block).
+    """
+    # O_BINARY only exists (and matters) on Windows.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(out_path, flags, 0o644)
+    try:
+        mv = memoryview(buf)
+        written = 0
+        while written < len(mv):
+            written += os.write(fd, mv[written:])
+    finally:
+        os.close(fd)
+
+
 def write_ilda_file(
     out_path: Union[str, Path],
-    frames: Sequence[IldaFrame],
+    frames: Sequence[Union[IldaFrame, IldaFrameArray]],
     *,
-    mode: str = "indexed",
+    mode: str = "auto",
     force_format: Optional[int] = None,
     include_eof_header: bool = False,  # <-- NEW (default off)
 ) -> Path:
+    """
+    Write frames to an ILDA file.
+
+    Format selection:
+      - force_format: explicit format code for every frame
+      - mode="truecolor": format 5, mode="indexed": format 0
+      - mode="auto": per frame, format 5 if any point carries r/g/b, else 0
+    """
     out_path = Path(out_path)
+    buf = _build_ilda_bytes(
+        frames,
+        mode=mode,
+        force_format=force_format,
+        include_eof_header=include_eof_header,
+    )
 
-    # Recommended: total_frames = number of frames (not last index)
-    total_frames = len(frames)
+    _write_all(out_path, buf)
 
-    with out_path.open("wb") as f:
-        for idx, frame in enumerate(frames):
-            pts = list(frame.points)
-
-            # Decide format code
-            if force_format is not None:
-                fmt = int(force_format)
-            else:
-                if mode.lower() == "truecolor" or _infer_truecolor(pts):
-                    fmt = 5
-                else:
-                    fmt = 0
-
-            h0 = frame.header
-            h = IldaHeader(
-                format_code=fmt,
-                frame_name=h0.frame_name,
-                company_name=h0.company_name,
-                num_records=len(pts),
-                frame_number=idx,
-                total_frames=total_frames,   # <-- FIXED
-                scanner_head=h0.scanner_head,
-            )
+    return out_path
 
-            _write_header(f, h)
 
-            for p_i, p in enumerate(pts):
-                last_point = (p_i == len(pts) - 1)
-                st = _status_byte(bool(p.blanked), last_point)
+def write_ilda_file_streaming(
+    out_path: Union[str, Path],
+    frames: Iterable[Union[IldaFrame, IldaFrameArray]],
+    *,
+    total_frames: int,
+    mode: str = "auto",
+    force_format: Optional[int] = None,
+    include_eof_header: bool = False,
+) -> Path:
+    """
+    Streaming variant of write_ilda_file for long animations.
 
-                if fmt == 0:
-                    rec = struct.pack(
-                        ">hhhBB",
-                        _clip_i16(p.x),
-                        _clip_i16(p.y),
-                        _clip_i16(p.z),
-                        _clip_u8(st),
-                        _clip_u8(p.color_index),
-                    )
-                    f.write(rec)
-
-                elif fmt == 1:
-                    rec = struct.pack(
-                        ">hhBB",
-                        _clip_i16(p.x),
-                        _clip_i16(p.y),
-                        _clip_u8(st),
-                        _clip_u8(p.color_index),
-                    )
-                    f.write(rec)
-
-                elif fmt == 4:
-                    r = 255 if p.r is None else p.r
-                    g = 255 if p.g is None else p.g
-                    b = 255 if p.b is None else p.b
-                    rec = struct.pack(
-                        ">hhhBBBB",
-                        _clip_i16(p.x),
-                        _clip_i16(p.y),
-                        _clip_i16(p.z),
-                        _clip_u8(st),
-                        _clip_u8(r),
-                        _clip_u8(g),
-                        _clip_u8(b),
-                    )
-                    f.write(rec)
-
-                elif fmt == 5:
-                    # 2D truecolor: x,y,status,r,g,b => 8 bytes
-                    r = 255 if p.r is None else p.r
-                    g = 255 if p.g is None else p.g
-                    b = 255 if p.b is None else p.b
-                    rec = struct.pack(
-                        ">hhBBBB",
-                        _clip_i16(p.x),
-                        _clip_i16(p.y),
-                        _clip_u8(st),
-                        _clip_u8(r),
-                        _clip_u8(g),
-                        _clip_u8(b),
-                    )
-                    f.write(rec)
+    Frames are consumed from any iterable (e.g. a generator) and written one
+    by one, so only the current frame is held in memory. total_frames goes
+    into every header and must therefore be known upfront; a ValueError is
+    raised if the iterable yields a different number of frames.
+    """
+    out_path = Path(out_path)
+    file_fmt = _resolve_file_format(mode, force_format)
 
-                else:
-                    raise ValueError(f"Unsupported ILDA format code for writer: {fmt}")
+    count = 0
+    with open(out_path, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+        for idx, frame in enumerate(frames):
+            h0, fmt, arr = _resolve_frame(frame, file_fmt)
+            buf = bytearray(_frame_size(fmt, arr))
+            _pack_frame_into(buf, 0, _frame_header(h0, fmt, len(arr), idx, total_frames), fmt, arr)
+            f.write(buf)
+            count += 1
 
-        # Optional EOF header (some readers like it, others treat it as a frame)
         if include_eof_header:
-            eof = IldaHeader(
-                format_code=0,
-                frame_name="",
-                company_name="",
-                num_records=0,
-                frame_number=0,
-                total_frames=0,
-                scanner_head=0,
-            )
-            _write_header(f, eof)
+            f.write(_EOF_HEADER)
+
+    if count != total_frames:
+        raise ValueError(f"write_ilda_file_streaming: total_frames={total_frames} but {count} frames were written")
+
+    return out_path
+
+
+def write_ilda_file_memmap(
+    out_path: Union[str, Path],
+    frames: Sequence[Union[IldaFrame, IldaFrameArray]],
+    *,
+    mode: str = "auto",
+    force_format: Optional[int] = None,
+    include_eof_header: bool = False,
+) -> Path:
+    """
+    Same output as write_ilda_file, for very large animations: the file is
+    sized upfront and memory-mapped, and frames are packed straight into
+    the mapping (no intermediate in-memory copy of the whole file).
+    """
+    out_path = Path(out_path)
+
+    def _map_file(size: int):
+        with open(out_path, "wb") as f:
+            f.truncate(size)
+        if size == 0:
+            return bytearray()  # an empty file cannot be mapped
+        return np.memmap(out_path, dtype=np.uint8, mode="r+", shape=(size,))
+
+    mm = _build_ilda_bytes(
+        frames,
+        mode=mode,
+        force_format=force_format,
+        include_eof_header=include_eof_header,
+        alloc=_map_file,
+    )
+    if isinstance(mm, np.memmap):
+        mm.flush()
+    # Drop the mapping now (required on Windows before the file is reused).
+    del mm
 
     return out_path
+
+
+def write_ilda_file_zst(
+    out_path: Union[str, Path],
+    frames: Sequence[Union[IldaFrame, IldaFrameArray]],
+    *,
+    mode: str = "auto",
+    force_format: Optional[int] = None,
+    include_eof_header: bool = False,
+    level: int = 3,
+) -> Path:
+    """
+    Same as write_ilda_file, but the file is zstd-compressed (.ild.zst),
+    for archiving long animations. Requires the optional 'zstandard' package.
+    """
+    if zstandard is None:
+        raise RuntimeError("write_ilda_file_zst requires the 'zstandard' package (pip install zstandard).")
+
+    out_path = Path(out_path)
+    buf = _build_ilda_bytes(
+        frames,
+        mode=mode,
+        force_format=force_format,
+        include_eof_header=include_eof_header,
+    )
+
+    # stream_writer compresses in chunks: no second full-size copy in memory.
+    cctx = zstandard.ZstdCompressor(level=int(level))
+    with open(out_path, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+        with cctx.stream_writer(f, size=len(buf), closefd=False) as zf:
+            zf.write(buf)
+
+    return out_path
+
+
+def write_test_square(out_path: Union[str, Path], size: int = 16000) -> Path:
+    """
+    Write a one-frame indexed ILDA test pattern: a closed square
+    (5 points, the first one blanked), one palette color per corner.
+
+    The frame is built directly as columns (IldaFrameArray), without
+    going through IldaPoint objects.
+    """
+    s = int(size)
+    frame = IldaFrameArray(
+        x=np.array([-s, s, s, -s, -s], dtype=np.int16),
+        y=np.array([s, s, -s, -s, s], dtype=np.int16),
+        blanked=np.array([True, False, False, False, False]),
+        color_index=np.array([1, 1, 2, 3, 4], dtype=np.uint8),
+        header=IldaHeader(format_code=0, frame_name="SQUARE", company_name="LPIP"),
+    )
+    return write_ilda_file(out_path, [frame], mode="indexed")
@@ -1,20 +1,30 @@
 # core/pipeline/arcade_lines_step.py
 from __future__ import annotations
 
+import multiprocessing
+import os
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice, repeat
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple
 
 import numpy as np
 import cv2
 
 from core.config import PROJECTS_ROOT
-from core.ilda_writer import IldaFrame, IldaPoint, write_ilda_file
+from core.ilda_writer import IldaFrameArray, IldaHeader, write_ilda_file_streaming
 from .base import FrameProgress, StepResult, ProgressCallback, CancelCallback
 
 ILDA_MIN = -32767
 ILDA_MAX = 32767
 ILDA_SPAN = ILDA_MAX - ILDA_MIN
 
+# frames PNG décodées en avance en mode séquentiel (workers=1)
+_PREFETCH_FRAMES = 4
+
 
 # ----------------------------
 # Utilitaires géométrie
@@ -25,15 +35,8 @@ def _rdp(points: List[Tuple[int, int]], eps: float) -> List[Tuple[int, int]]:
         return points
 
     pts = np.array(points, dtype=np.float32)
-
-    def dist_point_line(p, a, b) -> float:
-        ab = b - a
-        if np.allclose(ab, 0):
-            return float(np.linalg.norm(p - a))
-        t = float(np.dot(p - a, ab) / np.dot(ab, ab))
-        t = max(0.0, min(1.0, t))
-        proj = a + t * ab
-        return float(np.linalg.norm(p - proj))
+    # distances comparées au carré : pas de racine par point
+    eps2 = float(eps) * float(eps)
 
     keep = np.zeros(len(pts), dtype=bool)
     keep[0] = True
@@ -42,16 +45,23 @@ def _rdp(points: List[Tuple[int, int]], eps: float) -> List[Tuple[int, int]]:
 
     while stack:
         i, j = stack.pop()
+        if j - i < 2:
+            continue
         a = pts[i]
         b = pts[j]
-        max_d = 0.0
-        max_k = None
-        for k in range(i + 1, j):
-            d = dist_point_line(pts[k], a, b)
-            if d > max_d:
-                max_d = d
-                max_k = k
-        if max_k is not None and max_d > eps:
+        # distances point -> segment [a, b] de tout l'intervalle en une passe
+        seg = pts[i + 1 : j]
+        ab = b - a
+        ab2 = float(ab @ ab)
+        if ab2 > 0.0:
+            t = np.clip(((seg - a) @ ab) / ab2, 0.0, 1.0)
+            diff = seg - (a + t[:, None] * ab)
+        else:
+            diff = seg - a
+        d2 = (diff * diff).sum(axis=1)
+        k_rel = int(np.argmax(d2))
+        if float(d2[k_rel]) > eps2:
+            max_k = i + 1 + k_rel
             keep[max_k] = True
             stack.append((i, max_k))
             stack.append((max_k, j))
@@ -59,64 +69,81 @@ def _rdp(points: List[Tuple[int, int]], eps: float) -> List[Tuple[int, int]]:
     return [points[i] for i in range(len(points)) if keep[i]]
 
 
-def _neighbors8(y: int, x: int) -> List[Tuple[int, int]]:
-    out = []
-    for dy in (-1, 0, 1):
-        for dx in (-1, 0, 1):
-            if dy == 0 and dx == 0:
-                continue
-            out.append((y + dy, x + dx))
-    return out
+# Offsets (dy, dx) des 8 voisins, ligne par ligne.
+_N8: Tuple[Tuple[int, int], ...] = (
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1),
+)
+
+
+# (d, dy, dx) des voisins présents pour chaque masque 8 bits possible ;
+# le bit d correspond au voisin _N8[d], et _N8[7 - d] est la direction inverse.
+_NB_DIRS: Tuple[Tuple[Tuple[int, int, int], ...], ...] = tuple(
+    tuple((d, dy, dx) for d, (dy, dx) in enumerate(_N8) if m & (1 << d))
+    for m in range(256)
+)
+
+
+_KERNEL_3X3 = np.ones((3, 3), dtype=np.float32)
+
+
+def _neighbor_mask(skel01: np.ndarray) -> np.ndarray:
+    """
+    Masque uint8 par pixel : bit d = 1 si le voisin _N8[d] est
+    allumé dans le squelette. Calculé en 8 décalages vectorisés ; les pixels
+    hors image comptent comme éteints.
+    """
+    h, w = skel01.shape
+    padded = np.pad((skel01 > 0).astype(np.uint8), 1)
+    mask = np.zeros((h, w), dtype=np.uint8)
+    for d, (dy, dx) in enumerate(_N8):
+        mask |= padded[1 + dy : 1 + dy + h, 1 + dx : 1 + dx + w] << d
+    return mask
 
 
 def _zs_thinning(binary01: np.ndarray, max_iter: int = 50) -> np.ndarray:
     """
     Zhang-Suen thinning fallback.
-    binary01: uint8 (0/1)
+    binary01: uint8, tout pixel non nul est allumé (0/1 ou 0/255)
+
+    Vectorisé : chaque sous-itération évalue tous les pixels d'un coup sur des
+    vues décalées (p2..p9) de l'image, puis supprime en une affectation masquée.
     """
-    img = (binary01.copy() > 0).astype(np.uint8)
+    img = (binary01 > 0).astype(np.uint8)
     h, w = img.shape[:2]
+    if h < 3 or w < 3:
+        return img
+
+    center = img[1:-1, 1:-1]
+    # voisins (vues, donc à jour après chaque suppression)
+    p2 = img[:-2, 1:-1]
+    p3 = img[:-2, 2:]
+    p4 = img[1:-1, 2:]
+    p5 = img[2:, 2:]
+    p6 = img[2:, 1:-1]
+    p7 = img[2:, :-2]
+    p8 = img[1:-1, :-2]
+    p9 = img[:-2, :-2]
+    seq = (p2, p3, p4, p5, p6, p7, p8, p9, p2)
 
     def iter_step(step: int) -> int:
-        to_del = []
-        for y in range(1, h - 1):
-            for x in range(1, w - 1):
-                p1 = img[y, x]
-                if p1 != 1:
-                    continue
-                p2 = img[y - 1, x]
-                p3 = img[y - 1, x + 1]
-                p4 = img[y, x + 1]
-                p5 = img[y + 1, x + 1]
-                p6 = img[y + 1, x]
-                p7 = img[y + 1, x - 1]
-                p8 = img[y, x - 1]
-                p9 = img[y - 1, x - 1]
-                neigh = [p2, p3, p4, p5, p6, p7, p8, p9]
-                B = sum(neigh)
-                if B < 2 or B > 6:
-                    continue
-                A = 0
-                seq = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
-                for i in range(8):
-                    if seq[i] == 0 and seq[i + 1] == 1:
-                        A += 1
-                if A != 1:
-                    continue
-                if step == 0:
-                    if p2 * p4 * p6 != 0:
-                        continue
-                    if p4 * p6 * p8 != 0:
-                        continue
-                else:
-                    if p2 * p4 * p8 != 0:
-                        continue
-                    if p2 * p6 * p8 != 0:
-                        continue
-                to_del.append((y, x))
-        for (y, x) in to_del:
-            img[y, x] = 0
-        return len(to_del)
+        B = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+        # A = nombre de transitions 0 -> 1 dans la séquence p2..p9,p2
+        A = np.zeros_like(center)
+        for i in range(8):
+            A += (seq[i] == 0) & (seq[i + 1] == 1)
+        if step == 0:
+            m1 = p2 & p4 & p6
+            m2 = p4 & p6 & p8
+        else:
+            m1 = p2 & p4 & p8
+            m2 = p2 & p6 & p8
+        to_del = (center == 1) & (B >= 2) & (B <= 6) & (A == 1) & (m1 == 0) & (m2 == 0)
+        n = int(np.count_nonzero(to_del))
+        if n:
+            center[to_del] = 0
+        return n
 
     for _ in range(max_iter):
         c0 = iter_step(0)
@@ -126,66 +153,81 @@ def _zs_thinning(binary01: np.ndarray, max_iter: int = 50) -> np.ndarray:
     return img
 
 
-def _thin(binary01: np.ndarray) -> np.ndarray:
-    # essaie ximgproc.thinning si dispo, sinon fallback ZS
-    try:
-        ximg = cv2.ximgproc.thinning((binary01 * 255).astype(np.uint8))
-        return (ximg > 0).astype(np.uint8)
-    except Exception:
-        return _zs_thinning(binary01)
+# cv2.ximgproc n'existe qu'avec opencv-contrib-python : détecté une seule fois.
+_XIMGPROC_THINNING = getattr(getattr(cv2, "ximgproc", None), "thinning", None)
+if _XIMGPROC_THINNING is None:
+    warnings.warn(
+        "cv2.ximgproc indisponible : squelettisation arcade via le fallback Zhang-Suen "
+        "(plus lent). Installer opencv-contrib-python pour la version native.",
+        RuntimeWarning,
+        stacklevel=2,
+    )
+
+
+def _thin(mask: np.ndarray) -> np.ndarray:
+    """
+    Squelette d'un masque uint8 0/255 (sortie directe de Canny / threshold).
+    Rend un squelette uint8 où tout pixel non nul est allumé.
+    """
+    # ximgproc.thinning (C++) si dispo, sinon fallback ZS vectorisé
+    if _XIMGPROC_THINNING is not None:
+        try:
+            return _XIMGPROC_THINNING(mask)
+        except cv2.error:
+            pass
+    return _zs_thinning(mask)
 
 
 def _skeleton_to_polylines(skel01: np.ndarray) -> List[List[Tuple[int, int]]]:
     """
     Convertit un squelette (0/1) en polylines en parcourant le graphe 8-connexe.
+
+    Le squelette est très creux : tout le travail se fait sur sa boîte
+    englobante (les coordonnées rendues restent celles de l'image).
     """
-    h, w = skel01.shape
-    ys, xs = np.where(skel01 > 0)
-    if len(ys) == 0:
+    on = (skel01 > 0).view(np.uint8)
+    ox, oy, bw, bh = cv2.boundingRect(on)
+    if bw == 0 or bh == 0:
         return []
+    on = on[oy : oy + bh, ox : ox + bw]
+    ys, xs = np.nonzero(on)
 
-    # degrés
-    deg = np.zeros_like(skel01, dtype=np.uint8)
-    for y, x in zip(ys, xs):
-        d = 0
-        for ny, nx in _neighbors8(y, x):
-            if 0 <= ny < h and 0 <= nx < w and skel01[ny, nx] > 0:
-                d += 1
-        deg[y, x] = d
+    # degrés : somme 3x3 des pixels allumés (bord = 0) moins le pixel lui-même
+    deg = cv2.filter2D(on, cv2.CV_8U, _KERNEL_3X3, borderType=cv2.BORDER_CONSTANT) - on
+    deg[on == 0] = 0
 
-    endpoints = [(y, x) for y, x in zip(ys, xs) if deg[y, x] == 1]
-    junctions = {(y, x) for y, x in zip(ys, xs) if deg[y, x] >= 3}
+    endpoints = [tuple(p) for p in np.argwhere(deg == 1).tolist()]
+    junctions = {tuple(p) for p in np.argwhere(deg >= 3).tolist()}
 
-    visited_edges: set[Tuple[Tuple[int, int], Tuple[int, int]]] = set()
+    # arêtes parcourues : un octet par pixel, bit d = arête vers _N8[d]
+    # (posé aux deux extrémités, bit 7 - d côté voisin)
+    visited = bytearray(bh * bw)
 
-    def mark_edge(a, b):
-        if a <= b:
-            visited_edges.add((a, b))
-        else:
-            visited_edges.add((b, a))
+    def mark_edge(a, d, b):
+        visited[a[0] * bw + a[1]] |= 1 << d
+        visited[b[0] * bw + b[1]] |= 1 << (7 - d)
+
+    def edge_visited(a, d) -> bool:
+        return bool(visited[a[0] * bw + a[1]] >> d & 1)
 
-    def edge_visited(a, b) -> bool:
-        return (a, b) in visited_edges or (b, a) in visited_edges
+    # voisins précalculés une fois (masque 8 bits -> directions par table)
+    nbmask = _neighbor_mask(on)
 
     def next_neighbors(p):
         y, x = p
-        out = []
-        for ny, nx in _neighbors8(y, x):
-            if 0 <= ny < h and 0 <= nx < w and skel01[ny, nx] > 0:
-                out.append((ny, nx))
-        return out
+        return [(d, (y + dy, x + dx)) for d, dy, dx in _NB_DIRS[nbmask[y, x]]]
 
     polylines: List[List[Tuple[int, int]]] = []
 
     # 1) traces depuis endpoints
     for ep in endpoints:
-        for nb in next_neighbors(ep):
-            if edge_visited(ep, nb):
+        for d, nb in next_neighbors(ep):
+            if edge_visited(ep, d):
                 continue
             line = [ep]
             prev = ep
             cur = nb
-            mark_edge(prev, cur)
+            mark_edge(prev, d, cur)
             while True:
                 line.append(cur)
                 if cur in junctions or deg[cur] == 1:
@@ -193,81 +235,113 @@ def _skeleton_to_polylines(skel01: np.ndarray) -> List[List[Tuple[int, int]]]:
                 nbs = next_neighbors(cur)
                 # continuer tout droit : choisir le voisin != prev
                 nxt = None
-                for cand in nbs:
+                for cd, cand in nbs:
                     if cand != prev:
                         nxt = cand
                         break
                 if nxt is None:
                     break
                 prev, cur = cur, nxt
-                if edge_visited(prev, cur):
+                if edge_visited(prev, cd):
                     break
-                mark_edge(prev, cur)
+                mark_edge(prev, cd, cur)
             polylines.append(line)
 
     # 2) cycles (pas d'endpoints)
     for y, x in zip(ys, xs):
         p = (y, x)
-        for nb in next_neighbors(p):
-            if edge_visited(p, nb):
+        for d, nb in next_neighbors(p):
+            if edge_visited(p, d):
                 continue
             line = [p]
             prev = p
             cur = nb
-            mark_edge(prev, cur)
+            mark_edge(prev, d, cur)
             while True:
                 line.append(cur)
                 nbs = next_neighbors(cur)
                 nxt = None
-                for cand in nbs:
-                    if cand != prev and not edge_visited(cur, cand):
+                for cd, cand in nbs:
+                    if cand != prev and not edge_visited(cur, cd):
                         nxt = cand
                         break
                 if nxt is None:
                     break
                 prev, cur = cur, nxt
-                mark_edge(prev, cur)
+                mark_edge(prev, cd, cur)
                 if cur == p:
                     break
             polylines.append(line)
 
-    # convert (y,x) -> (x,y)
-    return [[(x, y) for (y, x) in pl] for pl in polylines]
+    # convert (y,x) -> (x,y), repère image
+    return [[(x + ox, y + oy) for (y, x) in pl] for pl in polylines]
 
 
-def _compute_global_norm(frames_polys: List[List[List[Tuple[int, int]]]]) -> Tuple[Tuple[float, float], float]:
-    all_pts = [pt for frame in frames_polys for poly in frame for pt in poly] if frames_polys else []
-    if not all_pts:
+def _compute_global_norm(bounds: Optional[Tuple[int, int, int, int]]) -> Tuple[Tuple[float, float], float]:
+    """
+    Centre/échelle globaux à partir des bornes (xmin, xmax, ymin, ymax) de tous
+    les points de toutes les frames, tenues à jour pendant la première passe.
+    """
+    if bounds is None:
         return (0.0, 0.0), 1.0
-    xs = [p[0] for p in all_pts]
-    ys = [p[1] for p in all_pts]
-    cx = (min(xs) + max(xs)) / 2.0
-    cy = (min(ys) + max(ys)) / 2.0
-    span = max(max(xs) - min(xs), max(ys) - min(ys), 1e-6)
+    xmin, xmax, ymin, ymax = bounds
+    cx = (xmin + xmax) / 2.0
+    cy = (ymin + ymax) / 2.0
+    span = max(xmax - xmin, ymax - ymin, 1e-6)
     scale = ILDA_SPAN / span
     return (cx, cy), scale
 
 def _norm_xy(
-    x: int,
-    y: int,
+    xy: np.ndarray,
     center: Tuple[float, float],
     scale: float,
     fill_ratio: float,
     *,
     invert_y: bool = False,
-) -> Tuple[int, int]:
+) -> np.ndarray:
+    """
+    Normalise un bloc de points pixels (N, 2) en coordonnées ILDA (N, 2) int16,
+    en une seule opération NumPy (arrondi au plus proche, bornage ILDA).
+    """
     cx, cy = center
     s = scale * float(fill_ratio)
-    xn = int(round((x - cx) * s))
+    out = np.empty(xy.shape, dtype=np.float64)
+    out[:, 0] = (xy[:, 0] - cx) * s
 
-    dy = (y - cy)
+    dy = xy[:, 1] - cy
     if invert_y:
         dy = -dy
-    yn = int(round(dy * s))
+    out[:, 1] = dy * s
+
+    # bornage dans [ILDA_MIN, ILDA_MAX] : le cast int16 est exact
+    return np.clip(np.rint(out, out=out), ILDA_MIN, ILDA_MAX, out=out).astype(np.int16)
+
+
+def _brightest_in_windows(img_bgr: np.ndarray, pts: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each (x, y) of pts (N, 2), the brightest BGR pixel (sum B+G+R) of its
+    (2r+1)x(2r+1) window. Window pixels outside the image are never picked.
+
+    Returns (best (M, 3) BGR, ok (N,) mask of the points lying inside the image).
+    """
+    h, w = img_bgr.shape[:2]
+    xi = np.rint(pts[:, 0]).astype(np.int64)
+    yi = np.rint(pts[:, 1]).astype(np.int64)
+    ok = (xi >= 0) & (yi >= 0) & (xi < w) & (yi < h)
+    xi = xi[ok]
+    yi = yi[ok]
 
-    xn = max(ILDA_MIN, min(ILDA_MAX, xn))
-    yn = max(ILDA_MIN, min(ILDA_MAX, yn))
-    return xn, yn
+    # (M, k*k) window coordinates, row-major inside each window
+    dy, dx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+    Y = yi[:, None] + dy.ravel()
+    X = xi[:, None] + dx.ravel()
+    inside = (Y >= 0) & (Y < h) & (X >= 0) & (X < w)
+    patch = img_bgr[np.clip(Y, 0, h - 1), np.clip(X, 0, w - 1)]  # (M, k*k, 3) BGR
+
+    bright = patch.sum(axis=2, dtype=np.int32)
+    bright[~inside] = -1
+    best = patch[np.arange(len(xi)), np.argmax(bright, axis=1)]
+    return best, ok
 
 
 def _sample_rgb_along_poly(img_bgr, poly, step: int = 6, radius: int = 1):
@@ -278,92 +352,115 @@ def _sample_rgb_along_poly(img_bgr, poly, step: int = 6, radius: int = 1):
     - pick the brightest pixel in that window to avoid background
     - aggregate via median (robust)
     """
-    import numpy as np
-
     if img_bgr is None or poly is None or len(poly) < 2:
         return 255, 255, 255
 
-    h, w = img_bgr.shape[:2]
-    samples = []
+    pts = np.asarray(poly[:: max(1, int(step))], dtype=np.float64).reshape(-1, 2)
+    best, _ok = _brightest_in_windows(img_bgr, pts, radius)
+    if not len(best):
+        return 255, 255, 255
 
-    pts = poly[:: max(1, int(step))]
-    for (x, y) in pts:
-        xi = int(round(x))
-        yi = int(round(y))
-        if xi < 0 or yi < 0 or xi >= w or yi >= h:
-            continue
+    # médiane des 3 canaux en un appel (BGR -> RGB)
+    med = np.median(best, axis=0)
+    return int(med[2]), int(med[1]), int(med[0])
 
-        x0 = max(0, xi - radius)
-        x1 = min(w - 1, xi + radius)
-        y0 = max(0, yi - radius)
-        y1 = min(h - 1, yi + radius)
 
-        patch = img_bgr[y0 : y1 + 1, x0 : x1 + 1]  # BGR
-        if patch.size == 0:
-            continue
+def _sample_rgb_per_poly(
+    img_bgr,
+    polylines: List[List[Tuple[int, int]]],
+    step: int = 6,
+    radius: int = 1,
+) -> List[Tuple[int, int, int]]:
+    """
+    _sample_rgb_along_poly for every polyline of a frame in one pass: the
+    windows and their brightness are computed once for the whole frame,
+    then the per-polyline medians are taken from one sort per channel.
+    """
+    n = len(polylines)
+    out: List[Tuple[int, int, int]] = [(255, 255, 255)] * n
+    if img_bgr is None or n == 0:
+        return out
 
-        # Brightness = sum(B,G,R). Pick brightest pixel in patch.
-        flat = patch.reshape(-1, 3)
-        idx = int(np.argmax(flat.sum(axis=1)))
-        b, g, r = flat[idx]
-        samples.append((int(r), int(g), int(b)))  # convert to RGB
+    st = max(1, int(step))
+    sampled = [poly[::st] if len(poly) >= 2 else [] for poly in polylines]
+    counts = np.array([len(sp) for sp in sampled], dtype=np.int64)
+    if not counts.sum():
+        return out
 
-    if not samples:
-        return 255, 255, 255
+    pts = np.asarray([pt for sp in sampled for pt in sp], dtype=np.float64).reshape(-1, 2)
+    best, ok = _brightest_in_windows(img_bgr, pts, radius)
+    group = np.repeat(np.arange(n), counts)[ok]  # sorted by polyline
+
+    cnt = np.bincount(group, minlength=n)
+    has = np.flatnonzero(cnt)
+    start = np.cumsum(cnt) - cnt
+    lo = (start + (cnt - 1) // 2)[has]
+    hi = (start + cnt // 2)[has]
+
+    # médiane = moyenne des deux valeurs centrales, tronquée comme int(np.median)
+    med = np.empty((len(has), 3), dtype=np.int64)
+    for c in range(3):
+        v = best[np.lexsort((best[:, c], group)), c].astype(np.int64)
+        med[:, c] = (v[lo] + v[hi]) // 2
+
+    for j, i in enumerate(has.tolist()):
+        b, g, r = med[j].tolist()
+        out[i] = (r, g, b)
+    return out
 
-    arr = np.array(samples, dtype=np.int32)
-    r = int(np.median(arr[:, 0]))
-    g = int(np.median(arr[:, 1]))
-    b = int(np.median(arr[:, 2]))
-    return r, g, b
 
 def _order_polylines(polylines: List[List[Tuple[int, int]]]) -> List[List[Tuple[int, int]]]:
     # greedy nearest-neighbor ordering (simple et efficace)
+    # Distances vers toutes les extrémités restantes calculées en une passe NumPy.
     if not polylines:
         return []
-    remaining = polylines[:]
-    ordered = [remaining.pop(0)]
-    while remaining:
-        last = ordered[-1][-1]
-        best_i = 0
-        best_d = 1e18
-        best_rev = False
-        for i, pl in enumerate(remaining):
-            d1 = (pl[0][0] - last[0]) ** 2 + (pl[0][1] - last[1]) ** 2
-            d2 = (pl[-1][0] - last[0]) ** 2 + (pl[-1][1] - last[1]) ** 2
-            if d1 < best_d:
-                best_d = d1
-                best_i = i
-                best_rev = False
-            if d2 < best_d:
-                best_d = d2
-                best_i = i
-                best_rev = True
-        nxt = remaining.pop(best_i)
-        if best_rev:
+    n = len(polylines)
+    # ends[2*i] = début de la polyline i, ends[2*i+1] = fin
+    ends = np.array([pt for pl in polylines for pt in (pl[0], pl[-1])], dtype=np.int64).reshape(-1, 2)
+    done = np.zeros(2 * n, dtype=bool)
+    big = np.iinfo(np.int64).max
+
+    ordered = [polylines[0]]
+    done[0:2] = True
+    last = ends[1]
+    for _ in range(n - 1):
+        d = ((ends - last) ** 2).sum(axis=1)
+        d[done] = big
+        # premier minimum : même départage qu'un parcours séquentiel (début avant fin)
+        k = int(np.argmin(d))
+        i = k // 2
+        done[2 * i : 2 * i + 2] = True
+        nxt = polylines[i]
+        if k % 2 == 1:
             nxt = list(reversed(nxt))
+            last = ends[2 * i]
+        else:
+            last = ends[2 * i + 1]
         ordered.append(nxt)
     return ordered
 
 
 def _render_poly_preview(
     polylines: List[List[Tuple[int, int]]],
-    img_bgr,
+    frame_shape: Optional[Tuple[int, int]],
     out_png: Path,
     *,
     preview_image_size: int,
-    sample_color: bool,
+    colors: Optional[List[Tuple[int, int, int]]] = None,
 ) -> bool:
-    if img_bgr is None or getattr(img_bgr, "size", 0) == 0:
+    """
+    colors: RGB par polyline (échantillonnées sur la frame), sinon blanc.
+    """
+    if not frame_shape:
         return False
-    h, w = img_bgr.shape[:2]
+    h, w = frame_shape
     canvas = np.zeros((h, w, 3), dtype=np.uint8)
-    for poly in polylines:
+    for i, poly in enumerate(polylines):
         if len(poly) < 2:
             continue
         pts = np.array(poly, dtype=np.int32).reshape((-1, 1, 2))
-        if sample_color:
-            r, g, b = _sample_rgb_along_poly(img_bgr, poly)
+        if colors is not None:
+            r, g, b = colors[i]
             color = (b, g, r)
         else:
             color = (255, 255, 255)
@@ -373,6 +470,122 @@ def _render_poly_preview(
     return bool(cv2.imwrite(str(out_png), canvas))
 
 
+@dataclass(frozen=True)
+class _FrameParams:
+    blur_ksize: int
+    skeleton_mode: bool
+    canny1: int
+    canny2: int
+    min_poly_len: int
+    simplify_eps: float
+    sample_color: bool
+    use_opencl: bool = False
+
+
+@dataclass
+class _FramePoints:
+    """Ce qui est gardé d'une frame entre les deux passes (compact, tronqué au budget)."""
+
+    pts: np.ndarray  # (n_pts, 2) int32, points pixels bout à bout
+    lens: np.ndarray  # (n_polys,) int64, longueur de chaque polyline
+    colors: Optional[List[Tuple[int, int, int]]] = None
+
+
+class _Canceled(Exception):
+    pass
+
+
+@dataclass
+class _FrameResult:
+    # frame_shape=None : PNG illisible
+    frame_shape: Optional[Tuple[int, int]]
+    polylines: List[List[Tuple[int, int]]]
+    # RGB par polyline si sample_color (l'image ne quitte pas le worker)
+    colors: Optional[List[Tuple[int, int, int]]] = None
+
+
+def _process_frame(png_path: Path, params: _FrameParams) -> _FrameResult:
+    """
+    Traitement complet d'une frame (indépendant des autres) :
+    PNG -> edges -> thinning -> polylines -> simplification -> ordering.
+    Fonction top-level pour pouvoir tourner dans un ProcessPoolExecutor.
+    """
+    return _process_image(cv2.imread(str(png_path), cv2.IMREAD_COLOR), params)
+
+
+def _decode_prefetched(pngs: List[Path], ahead: int = _PREFETCH_FRAMES):
+    """
+    Décode les PNG dans l'ordre, `ahead` frames en avance sur le consommateur
+    (threads : cv2.imread relâche le GIL pendant le décodage).
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        it = iter(pngs)
+        pending = deque(
+            pool.submit(cv2.imread, str(p), cv2.IMREAD_COLOR) for p in islice(it, ahead)
+        )
+        while pending:
+            img_bgr = pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(cv2.imread, str(nxt), cv2.IMREAD_COLOR))
+            yield img_bgr
+
+
+def _process_image(img_bgr: Optional[np.ndarray], params: _FrameParams) -> _FrameResult:
+    if img_bgr is None:
+        return _FrameResult(None, [])
+
+    # T-API : avec un UMat, cvtColor/flou/seuil/Canny tournent en OpenCL
+    src = img_bgr
+    if params.use_opencl and cv2.ocl.haveOpenCL():
+        src = cv2.UMat(img_bgr)
+
+    gray = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
+    # 3x3 n'apporte rien avant Canny (qui lisse déjà via Sobel) : flou à partir de 5
+    blur_ksize = params.blur_ksize
+    if blur_ksize and blur_ksize >= 5:
+        k = blur_ksize if blur_ksize % 2 == 1 else blur_ksize + 1
+        gray = cv2.GaussianBlur(gray, (k, k), 0)
+
+    if params.skeleton_mode:
+        _, bw = cv2.threshold(
+            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+        )
+        if cv2.mean(bw)[0] > 127:
+            bw = cv2.bitwise_not(bw)
+    else:
+        bw = cv2.Canny(
+            gray, threshold1=params.canny1, threshold2=params.canny2, apertureSize=3, L2gradient=True
+        )
+
+    if isinstance(bw, cv2.UMat):
+        bw = bw.get()
+
+    # masques 0/255 passés tels quels au thinning (pas de copie 0/1 intermédiaire)
+    skel = _thin(bw)
+
+    polylines = _skeleton_to_polylines(skel)
+    # filtre longueur
+    polylines = [pl for pl in polylines if len(pl) >= max(2, params.min_poly_len)]
+    # simplification
+    polylines = [_rdp(pl, params.simplify_eps) for pl in polylines]
+    polylines = [pl for pl in polylines if len(pl) >= 2]
+    # ordering pour limiter les jumps
+    polylines = _order_polylines(polylines)
+
+    colors = None
+    if params.sample_color:
+        colors = _sample_rgb_per_poly(img_bgr, polylines)
+
+    return _FrameResult(img_bgr.shape[:2], polylines, colors)
+
+
+def _resolve_workers(workers: Optional[int], n_frames: int) -> int:
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_frames))
+
+
 def run_arcade_lines_step(
     project: str,
     *,
@@ -395,6 +608,8 @@ def run_arcade_lines_step(
     preview_warmup_every_n: int = 0,
     preview_warmup_frames: int = 0,
     preview_image_size: int = 640,
+    workers: Optional[int] = 1,
+    use_opencl: bool = False,
     progress_cb: Optional[ProgressCallback] = None,
     cancel_cb: Optional[CancelCallback] = None,
 ) -> StepResult:
@@ -406,6 +621,19 @@ def run_arcade_lines_step(
       - kpps: vitesse laser (kilo-points par seconde)
       - budget auto: (kpps*1000/fps)*ppf_ratio
       - max_points_per_frame force un budget explicite si fourni
+
+    workers:
+      - frames traitées en parallèle (processus) ; 1 = séquentiel (défaut),
+        None/0 = nb de CPU (opt-in : pool en "spawn", jamais de fork depuis
+        un thread de la GUI)
+
+    use_opencl:
+      - gris/flou/seuil/Canny via cv2.UMat (OpenCL, GPU/iGPU) si disponible ;
+        sans OpenCL, repli transparent sur le CPU
+
+    blur_ksize/canny1/canny2:
+      - flou gaussien seulement si blur_ksize >= 5 (3 ou moins = pas de flou)
+      - Canny utilise la norme L2 du gradient (contours plus propres)
     """
     step_name = "arcade_lines"
 
@@ -441,11 +669,10 @@ def run_arcade_lines_step(
             )
         )
 
-    # 1) construire toutes les polylines (pour normalisation globale stable)
-    all_frames_polys: List[List[List[Tuple[int, int]]]] = []
-
-    # on stocke aussi l'image BGR si sampling couleur
-    bgr_cache: Dict[int, np.ndarray] = {}
+    # 1) extraire les polylines de chaque frame ; seules les bornes globales
+    #    (normalisation stable) et des points compacts tronqués au budget sont gardés
+    frames_pts: List[Optional[_FramePoints]] = []
+    bounds: Optional[Tuple[int, int, int, int]] = None
 
     preview_dir = project_root / "preview"
     preview_stride = int(preview_every_n) if preview_every_n is not None else 0
@@ -466,133 +693,185 @@ def run_arcade_lines_step(
             except Exception:
                 pass
 
-    for idx, p in enumerate(pngs):
-        if cancel_cb and cancel_cb():
-            return StepResult(False, "Canceled.", project_root)
-
-        img_bgr = cv2.imread(str(p), cv2.IMREAD_COLOR)
-        if img_bgr is None:
-            all_frames_polys.append([])
-            continue
+    params = _FrameParams(
+        blur_ksize=blur_ksize,
+        skeleton_mode=skeleton_mode,
+        canny1=canny1,
+        canny2=canny2,
+        min_poly_len=min_poly_len,
+        simplify_eps=simplify_eps,
+        sample_color=sample_color,
+        use_opencl=use_opencl,
+    )
+    n_workers = _resolve_workers(workers, len(pngs))
+    executor: Optional[ProcessPoolExecutor] = None
+    decoded = None
+    if n_workers > 1:
+        # frames indépendantes : calcul en parallèle, résultats consommés dans l'ordre
+        # spawn : un fork depuis un thread (GUI Qt, threads OpenCV) n'est pas sûr
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        results = executor.map(_process_frame, pngs, repeat(params), chunksize=4)
+    else:
+        # séquentiel : le décodage PNG des frames suivantes recouvre le calcul
+        decoded = _decode_prefetched(pngs)
+        results = (_process_image(img_bgr, params) for img_bgr in decoded)
 
-        if sample_color:
-            bgr_cache[idx] = img_bgr
+    try:
+        for idx, res in enumerate(results):
+            if cancel_cb and cancel_cb():
+                return StepResult(False, "Canceled.", project_root)
 
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        if blur_ksize and blur_ksize >= 3:
-            k = blur_ksize if blur_ksize % 2 == 1 else blur_ksize + 1
-            gray = cv2.GaussianBlur(gray, (k, k), 0)
+            if res.frame_shape is None:
+                frames_pts.append(None)
+                continue
 
-        if skeleton_mode:
-            _, bw = cv2.threshold(
-                gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
-            if np.mean(bw) > 127:
-                bw = cv2.bitwise_not(bw)
-            binary01 = (bw > 0).astype(np.uint8)
-        else:
-            edges = cv2.Canny(gray, threshold1=canny1, threshold2=canny2)
-            binary01 = (edges > 0).astype(np.uint8)
-
-        skel01 = _thin(binary01)
-
-        polylines = _skeleton_to_polylines(skel01)
-        # filtre longueur
-        polylines = [pl for pl in polylines if len(pl) >= max(2, min_poly_len)]
-        # simplification
-        polylines = [_rdp(pl, simplify_eps) for pl in polylines]
-        polylines = [pl for pl in polylines if len(pl) >= 2]
-        # ordering pour limiter les jumps
-        polylines = _order_polylines(polylines)
-
-        all_frames_polys.append(polylines)
-
-        preview_path: Optional[Path] = None
-        if progress_cb:
-            do_preview = False
-            if preview_enabled:
-                if idx == 0:
-                    do_preview = True
-                elif warmup_stride > 0 and warmup_frames > 0 and (idx + 1) <= warmup_frames:
-                    do_preview = ((idx + 1) % warmup_stride == 0)
-                elif preview_stride > 0:
-                    do_preview = ((idx + 1) % preview_stride == 0)
-                if (idx + 1) == len(pngs):
-                    do_preview = True
-
-            if do_preview:
-                preview_path = preview_dir / f"arcade_preview_{idx + 1:04d}.png"
-                if _render_poly_preview(
-                    polylines,
-                    img_bgr,
-                    preview_path,
-                    preview_image_size=preview_image_size,
-                    sample_color=sample_color,
-                ):
-                    pass
+            polylines = res.polylines
+            lens = np.array([len(poly) for poly in polylines], dtype=np.int64)
+            flat = np.asarray([pt for poly in polylines for pt in poly], dtype=np.int32).reshape(-1, 2)
+            if len(flat):
+                lo = flat.min(axis=0).tolist()
+                hi = flat.max(axis=0).tolist()
+                if bounds is None:
+                    bounds = (lo[0], hi[0], lo[1], hi[1])
                 else:
-                    preview_path = None
-
-            progress_cb(
-                FrameProgress(
-                    step_name=step_name,
-                    message=f"Frame {idx+1}/{len(pngs)}: polylines={len(polylines)}",
-                    frame_index=idx + 1,
-                    total_frames=len(pngs),
-                    frame_path=preview_path,
+                    bounds = (
+                        min(bounds[0], lo[0]),
+                        max(bounds[1], hi[0]),
+                        min(bounds[2], lo[1]),
+                        max(bounds[3], hi[1]),
+                    )
+            frames_pts.append(
+                _FramePoints(
+                    pts=flat[:max_points_per_frame].copy(),
+                    lens=lens,
+                    colors=res.colors if sample_color else None,
                 )
             )
 
-    center, scale = _compute_global_norm(all_frames_polys)
-
-    # 2) conversion ILDA (avec cap points/frame)
-    frames_out: List[IldaFrame] = []
-
-    for idx, polylines in enumerate(all_frames_polys):
-        if cancel_cb and cancel_cb():
-            return StepResult(False, "Canceled.", project_root)
-
-        pts_out: List[IldaPoint] = []
-        img_bgr = bgr_cache.get(idx) if sample_color else None
-
-        for poly in polylines:
-            if len(pts_out) >= max_points_per_frame:
-                break
-
-            rgb = _sample_rgb_along_poly(img_bgr, poly) if sample_color else (255, 255, 255)
-            if swap_rb:
-                rgb = (rgb[2], rgb[1], rgb[0])
+            preview_path: Optional[Path] = None
+            if progress_cb:
+                do_preview = False
+                if preview_enabled:
+                    if idx == 0:
+                        do_preview = True
+                    elif warmup_stride > 0 and warmup_frames > 0 and (idx + 1) <= warmup_frames:
+                        do_preview = ((idx + 1) % warmup_stride == 0)
+                    elif preview_stride > 0:
+                        do_preview = ((idx + 1) % preview_stride == 0)
+                    if (idx + 1) == len(pngs):
+                        do_preview = True
+
+                if do_preview:
+                    preview_path = preview_dir / f"arcade_preview_{idx + 1:04d}.png"
+                    if _render_poly_preview(
+                        polylines,
+                        res.frame_shape,
+                        preview_path,
+                        preview_image_size=preview_image_size,
+                        colors=res.colors,
+                    ):
+                        pass
+                    else:
+                        preview_path = None
+
+                progress_cb(
+                    FrameProgress(
+                        step_name=step_name,
+                        message=f"Frame {idx+1}/{len(pngs)}: polylines={len(polylines)}",
+                        frame_index=idx + 1,
+                        total_frames=len(pngs),
+                        frame_path=preview_path,
+                    )
+                )
+    finally:
+        if executor is not None:
+            # pas d'attente des frames en vol : l'annulation rend la main tout de suite
+            executor.shutdown(wait=False, cancel_futures=True)
+        if decoded is not None:
+            decoded.close()
+
+    center, scale = _compute_global_norm(bounds)
+    total = len(frames_pts)
+
+    # 2) conversion ILDA (avec cap points/frame), frame par frame en colonnes
+    #    NumPy, écrites au fil de l'eau (fichier temporaire, renommé à la fin)
+    def _emit_frames():
+        for idx, fp in enumerate(frames_pts):
+            if cancel_cb and cancel_cb():
+                raise _Canceled()
+
+            header = IldaHeader(format_code=5, frame_name=f"F{idx:04d}", company_name="LPIP", scanner_head=0)
+            n_pts = len(fp.pts) if fp is not None else 0
+
+            if n_pts > 0:
+                lens = fp.lens
+                nxy = _norm_xy(fp.pts.astype(np.float64), center, scale, fill_ratio, invert_y=invert_y)
+
+                # premier point de chaque polyline : blanked (saut)
+                starts = np.cumsum(lens) - lens
+                blanked = np.zeros(n_pts, dtype=bool)
+                blanked[starts[starts < n_pts]] = True
+
+                # couleur de la polyline répétée sur ses points
+                if fp.colors is not None:
+                    rgb = np.asarray(fp.colors, dtype=np.uint8).reshape(-1, 3)
+                else:
+                    rgb = np.full((len(lens), 3), 255, dtype=np.uint8)
+                if swap_rb:
+                    rgb = rgb[:, ::-1]
+                rgb_pts = np.repeat(rgb, lens, axis=0)[:n_pts]
+
+                frame = IldaFrameArray(
+                    x=nxy[:, 0],
+                    y=nxy[:, 1],
+                    blanked=blanked,
+                    r=rgb_pts[:, 0],
+                    g=rgb_pts[:, 1],
+                    b=rgb_pts[:, 2],
+                    header=header,
+                )
+            else:
+                # jamais de frame vide : un point blanked au centre
+                n_pts = 1
+                frame = IldaFrameArray(
+                    x=np.zeros(1, dtype=np.int16),
+                    y=np.zeros(1, dtype=np.int16),
+                    blanked=np.ones(1, dtype=bool),
+                    r=np.full(1, 255, dtype=np.uint8),
+                    g=np.full(1, 255, dtype=np.uint8),
+                    b=np.full(1, 255, dtype=np.uint8),
+                    header=header,
+                )
 
-            x0, y0 = poly[0]
-            xn0, yn0 = _norm_xy(x0, y0, center, scale, fill_ratio, invert_y=invert_y)
-            pts_out.append(IldaPoint(x=xn0, y=yn0, blanked=True, r=rgb[0], g=rgb[1], b=rgb[2]))
-            
-            for (x, y) in poly[1:]:
-                if len(pts_out) >= max_points_per_frame:
-                    break
-                xn, yn = _norm_xy(x, y, center, scale, fill_ratio, invert_y=invert_y)
-                pts_out.append(IldaPoint(x=xn, y=yn, blanked=False, r=rgb[0], g=rgb[1], b=rgb[2]))
-        
-        if not pts_out:
-            pts_out.append(IldaPoint(x=0, y=0, blanked=True, r=255, g=255, b=255))
-
-        frames_out.append(IldaFrame(name=f"F{idx:04d}", company="LPIP", points=pts_out, projector=0))
-
-        if progress_cb:
-            progress_cb(
-                FrameProgress(
-                    step_name=step_name,
-                    message=f"Frame {idx+1}/{len(all_frames_polys)}: points={len(pts_out)}/{max_points_per_frame} (kpps={kpps}, fps={fps})",
-                    frame_index=idx + 1,
-                    total_frames=len(all_frames_polys),
-                    frame_path=None,
+            yield frame
+
+            if progress_cb:
+                progress_cb(
+                    FrameProgress(
+                        step_name=step_name,
+                        message=f"Frame {idx+1}/{total}: points={n_pts}/{max_points_per_frame} (kpps={kpps}, fps={fps})",
+                        frame_index=idx + 1,
+                        total_frames=total,
+                        frame_path=None,
+                    )
                 )
-            )
 
-    write_ilda_file(out_path, frames_out, mode="truecolor")
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    try:
+        write_ilda_file_streaming(tmp_path, _emit_frames(), total_frames=total, mode="truecolor")
+    except _Canceled:
+        tmp_path.unlink(missing_ok=True)
+        return StepResult(False, "Canceled.", project_root)
+    except BaseException:
+        # écriture / progress_cb / nb de frames incohérent : pas de .ild.tmp orphelin
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, out_path)
 
     return StepResult(
         True,
-        f"Arcade v2 computed -> {out_path} ({len(all_frames_polys)} frames)",
+        f"Arcade v2 computed -> {out_path} ({total} frames)",
         project_root,
     )
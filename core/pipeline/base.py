@@ -3,10 +3,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class FrameProgress:
     """
     Représente l'avancement d'un step.
@@ -16,6 +16,8 @@ class FrameProgress:
     - frame_index : index de frame déjà traitée (0-based ou 1-based) ou None
     - total_frames : nombre total de frames si connu, sinon None
     - frame_path : chemin de la dernière frame écrite (PNG/BMP/SVG...)
+
+    slots : un message par frame et par step, sans __dict__ par instance.
     """
 
     step_name: str
@@ -33,11 +35,14 @@ class StepResult:
     - success : True si tout s'est bien passé
     - message : résumé textuel
     - output_dir : répertoire de sortie principal du step
+    - frames : fichiers produits, dans l'ordre, si le step les connaît déjà
+      (évite aux étapes suivantes de re-lister le dossier) ; None sinon
     """
 
     success: bool
     message: str
     output_dir: Optional[Path] = None
+    frames: Optional[List[Path]] = None
 
 
 # Callbacks utilisés par les steps
@@ -1,18 +1,38 @@
 # core/pipeline/bitmap_step.py
 from __future__ import annotations
 
+import io
 import json
+import multiprocessing
+import os
+import shutil
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Callable, Deque, Iterable, Iterator, Optional, Dict, Any, List, Tuple
 
+import cv2
 import numpy as np
 from PIL import Image
 
+# orjson (C) si dispo pour les manifests JSON, sinon json standard
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 from core.config import PROJECTS_ROOT
-from core.bitmap_convert import convert_project_frames_to_bmp
+from core.bitmap_convert import _convert_png_to_bmp, convert_project_frames_to_bmp
 from .base import FrameProgress, StepResult, ProgressCallback, CancelCallback
 
 
+# frames en vol par étage (décodage / écriture) en mode arcade séquentiel
+_PIPELINE_DEPTH = 4
+
+
 # ----------------------------------------------------------------------
 # Arcade helpers
 # ----------------------------------------------------------------------
@@ -21,12 +41,27 @@ def _cancelled(cancel_cb: Optional[CancelCallback]) -> bool:
     return bool(cancel_cb and cancel_cb())
 
 
+def _resolve_workers(workers: Optional[int], n_frames: int) -> int:
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_frames))
+
+
 def _rgb_distance(c1: Tuple[int, int, int], c2: Tuple[int, int, int]) -> int:
     return (c1[0] - c2[0]) ** 2 + (c1[1] - c2[1]) ** 2 + (c1[2] - c2[2]) ** 2
 
 
-def _is_near_black(rgb: Tuple[int, int, int], thr: int = 40) -> bool:
-    return (rgb[0] + rgb[1] + rgb[2]) <= thr
+def _near_black_mask(palette: List[Tuple[int, int, int]], thr: int = 40) -> np.ndarray:
+    """Masque (256,) : True pour les entrées de palette "proches du noir" (r+g+b <= thr)."""
+    dark = np.zeros(256, dtype=bool)
+    if palette:
+        pal = np.asarray(palette[:256], dtype=np.int32).reshape(-1, 3)
+        dark[: len(pal)] = pal.sum(axis=1) <= thr
+    return dark
+
+
+# élément structurant carré 3x3 (8-voisinage)
+_SE3 = np.ones((3, 3), dtype=np.uint8)
 
 
 def _morph_open_close(mask: np.ndarray, open_iters: int, close_iters: int) -> np.ndarray:
@@ -35,34 +70,21 @@ def _morph_open_close(mask: np.ndarray, open_iters: int, close_iters: int) -> np
     - open = erosion puis dilation
     - close = dilation puis erosion
 
-    Implémentée via convolution max/min par voisinage 3x3, itératif.
+    Implémentée via OpenCV (3x3, bord = 0 : les pixels au bord de l'image
+    s'érodent comme avec un padding de zéros).
+
+    Ouverture et fermeture sont idempotentes (open(open(m)) == open(m), idem
+    close) : répéter la même passe ne change rien, une seule suffit quel que
+    soit le nombre d'itérations demandé.
     """
     if open_iters <= 0 and close_iters <= 0:
         return mask
 
-    def erode(m: np.ndarray) -> np.ndarray:
-        # pixel reste 1 si tous ses voisins 3x3 sont 1
-        padded = np.pad(m, 1, mode="constant", constant_values=0)
-        out = np.ones_like(m, dtype=np.uint8)
-        for dy in (-1, 0, 1):
-            for dx in (-1, 0, 1):
-                out &= padded[1 + dy:1 + dy + m.shape[0], 1 + dx:1 + dx + m.shape[1]]
-        return out
-
-    def dilate(m: np.ndarray) -> np.ndarray:
-        # pixel devient 1 si un voisin 3x3 est 1
-        padded = np.pad(m, 1, mode="constant", constant_values=0)
-        out = np.zeros_like(m, dtype=np.uint8)
-        for dy in (-1, 0, 1):
-            for dx in (-1, 0, 1):
-                out |= padded[1 + dy:1 + dy + m.shape[0], 1 + dx:1 + dx + m.shape[1]]
-        return out
-
     out = mask
-    for _ in range(open_iters):
-        out = dilate(erode(out))
-    for _ in range(close_iters):
-        out = erode(dilate(out))
+    if open_iters > 0:
+        out = cv2.morphologyEx(out, cv2.MORPH_OPEN, _SE3, borderType=cv2.BORDER_CONSTANT, borderValue=0)
+    if close_iters > 0:
+        out = cv2.morphologyEx(out, cv2.MORPH_CLOSE, _SE3, borderType=cv2.BORDER_CONSTANT, borderValue=0)
     return out
 
 
@@ -74,50 +96,25 @@ def _remove_small_components(mask: np.ndarray, min_area: int) -> np.ndarray:
     if min_area <= 1:
         return mask
 
-    h, w = mask.shape
-    visited = np.zeros((h, w), dtype=np.uint8)
-    out = mask.copy()
-
-    def neighbors(y: int, x: int):
-        if y > 0:
-            yield y - 1, x
-        if y + 1 < h:
-            yield y + 1, x
-        if x > 0:
-            yield y, x - 1
-        if x + 1 < w:
-            yield y, x + 1
-
-    for y in range(h):
-        for x in range(w):
-            if out[y, x] == 0 or visited[y, x] == 1:
-                continue
-
-            # BFS
-            stack = [(y, x)]
-            visited[y, x] = 1
-            comp = [(y, x)]
-
-            while stack:
-                cy, cx = stack.pop()
-                for ny, nx in neighbors(cy, cx):
-                    if out[ny, nx] == 1 and visited[ny, nx] == 0:
-                        visited[ny, nx] = 1
-                        stack.append((ny, nx))
-                        comp.append((ny, nx))
-
-            if len(comp) < min_area:
-                for py, px in comp:
-                    out[py, px] = 0
-
-    return out
+    # étiquetage natif (OpenCV) puis filtrage des aires par table de correspondance
+    _n, labels, stats, _centroids = cv2.connectedComponentsWithStats(mask, connectivity=4)
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_area
+    keep[0] = False  # fond
+    return keep.astype(np.uint8)[labels]
 
 
-def _quantize_image(img_rgb: Image.Image, n_colors: int) -> Image.Image:
+def _quantize_image(img_rgb: Image.Image, n_colors: int, palette: Optional[List[int]] = None) -> Image.Image:
     """
     Quantification adaptive palette (PIL) → retourne image en mode 'P'.
+
+    palette (liste plate r,g,b,... d'une frame déjà quantifiée) : les pixels sont
+    seulement rapportés à la couleur la plus proche, sans reconstruire de palette.
     """
     # dither=0 pour éviter du bruit sur les bords
+    if palette is not None:
+        pal_img = Image.new("P", (1, 1))
+        pal_img.putpalette(palette)
+        return img_rgb.quantize(palette=pal_img, dither=Image.Dither.NONE)
     return img_rgb.quantize(colors=int(n_colors), method=Image.MEDIANCUT, dither=Image.Dither.NONE)
 
 
@@ -129,23 +126,33 @@ def _palette_from_p_image(img_p: Image.Image) -> List[Tuple[int, int, int]]:
     return colors
 
 
-def _pick_background_index(img_p: Image.Image, palette: List[Tuple[int, int, int]]) -> int:
+def _pick_background_index(arr: np.ndarray, palette: List[Tuple[int, int, int]]) -> Tuple[int, np.ndarray]:
     """
     Choisit l'index de fond :
     - priorise une couleur "proche du noir" qui est très fréquente
     - fallback: index le plus fréquent
+
+    arr : indices palette (uint8) de l'image quantifiée, déjà matérialisés par l'appelant.
+    Retourne (index de fond, histogramme 256 bins) : l'histogramme sert aussi à
+    l'appelant pour lister les indices présents.
     """
-    arr = np.array(img_p, dtype=np.uint8)
     hist = np.bincount(arr.ravel(), minlength=256)
 
-    # indices triés par fréquence décroissante
-    by_freq = np.argsort(-hist)
+    # seuls les 16 plus fréquents comptent : sélection partielle, puis tri de ces 16
+    top = np.argpartition(-hist, 15)[:16]
+    by_freq = top[np.argsort(-hist[top], kind="stable")]
+
+    # premier "proche du noir" dans l'ordre des fréquences, sinon le plus fréquent
+    dark = by_freq[_near_black_mask(palette)[by_freq]]
+    if len(dark):
+        return int(dark[0]), hist
+
+    return int(by_freq[0]), hist
 
-    for idx in by_freq[:min(16, len(by_freq))]:
-        if idx < len(palette) and _is_near_black(palette[idx]):
-            return int(idx)
 
-    return int(by_freq[0])
+# table 8 bits pour _write_bmp_bw : fond (0) -> blanc, tout le reste -> noir
+_BW_LUT = np.zeros(256, dtype=np.uint8)
+_BW_LUT[0] = 255
 
 
 def _write_bmp_bw(path: Path, mask01: np.ndarray) -> None:
@@ -154,90 +161,310 @@ def _write_bmp_bw(path: Path, mask01: np.ndarray) -> None:
     - foreground (mask=1) → noir (0)
     - background (mask=0) → blanc (255)
     """
-    img = Image.fromarray(np.where(mask01 > 0, 0, 255).astype(np.uint8), mode="L")
-    img.save(path)
+    # une passe LUT (0 -> 255, non nul -> 0) puis encodage BMP natif OpenCV
+    bw = cv2.LUT(mask01, _BW_LUT)
+    if not cv2.imwrite(str(path), bw):
+        # imwrite renvoie False sans lever (ex: chemin non ASCII sous Windows) :
+        # repli PIL, qui lève en cas d'échec comme avant
+        Image.fromarray(bw).save(path)
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Manifest JSON indenté (2 espaces), même rendu avec orjson ou json."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
-def _generate_arcade_layers_for_frame(
-    png_path: Path,
-    bmp_dir: Path,
+@dataclass
+class _ArcadeLayers:
+    """Résultat calculé d'une frame arcade, pas encore écrit sur disque."""
+
+    frame_id: str  # "0001"
+    layer_masks: List[np.ndarray]  # masques 0/1, alignés sur manifest["layers"]
+    union_mask: np.ndarray
+    manifest: Dict[str, Any]
+
+
+# OpenCV >= 4.11 décode directement en RGB (pas de cvtColor BGR->RGB à payer)
+_IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+
+def _load_rgb(png_path: Path) -> Image.Image:
+    # décodage libpng d'OpenCV si possible ; PIL en repli (OpenCV ancien,
+    # chemin non ASCII sous Windows, ...)
+    if _IMREAD_COLOR_RGB is not None:
+        rgb = cv2.imread(str(png_path), _IMREAD_COLOR_RGB)
+        if rgb is not None:
+            return Image.fromarray(rgb)
+    with Image.open(png_path) as im:
+        return im.convert("RGB")
+
+
+def _decode_rgb(data: bytes) -> Image.Image:
+    # même décodage que _load_rgb, pour des octets PNG déjà en mémoire
+    if _IMREAD_COLOR_RGB is not None:
+        rgb = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _IMREAD_COLOR_RGB)
+        if rgb is not None:
+            return Image.fromarray(rgb)
+    with Image.open(io.BytesIO(data)) as im:
+        return im.convert("RGB")
+
+
+def _compute_arcade_layers(
+    img_rgb: Image.Image,
+    png_name: str,
     *,
     n_colors: int,
     min_area: int,
     morph_open: int,
     morph_close: int,
-) -> Dict[str, Any]:
+    palette: Optional[List[int]] = None,
+) -> _ArcadeLayers:
     """
-    Génère les couches arcade d'une frame :
-    - frame_XXXX_cYY.bmp
-    - frame_XXXX.bmp (union preview)
-    - frame_XXXX_layers.json
+    Quantification + masques nettoyés d'une frame (aucune écriture disque).
     """
-    frame_stem = png_path.stem.replace("frame_", "")  # "0001"
+    frame_stem = Path(png_name).stem.replace("frame_", "")  # "0001"
     frame_id = frame_stem
 
-    img_rgb = Image.open(png_path).convert("RGB")
-    img_p = _quantize_image(img_rgb, n_colors=n_colors)
+    # palette verrouillée : le n° de couche est l'index palette, stable d'une frame à l'autre
+    locked = palette is not None
+    img_p = _quantize_image(img_rgb, n_colors=n_colors, palette=palette)
     palette = _palette_from_p_image(img_p)
 
     arr = np.array(img_p, dtype=np.uint8)
-    bg_idx = _pick_background_index(img_p, palette)
+    bg_idx, hist = _pick_background_index(arr, palette)
 
-    # indices présents (hors background)
-    present = np.unique(arr)
-    layer_indices = [int(i) for i in present if int(i) != bg_idx]
+    # indices présents (hors background), croissants : lus dans l'histogramme, sans tri
+    layer_indices = [i for i in np.flatnonzero(hist).tolist() if i != bg_idx]
 
     layers_meta: List[Dict[str, Any]] = []
+    kept_masks: List[np.ndarray] = []
     union_mask = np.zeros(arr.shape, dtype=np.uint8)
 
+    # masques 0/1 de toutes les couches en une comparaison (K, H, W), vus en uint8 sans copie
+    idx_arr = np.asarray(layer_indices, dtype=np.uint8)
+    layer_masks = (arr[None, :, :] == idx_arr[:, None, None]).view(np.uint8)
+
+    do_morph = morph_open > 0 or morph_close > 0
+    do_area = min_area > 1
+
     for li, idx in enumerate(layer_indices):
         rgb = palette[idx] if idx < len(palette) else (255, 255, 255)
 
-        mask = (arr == idx).astype(np.uint8)
+        # Nettoyage morpho + bruit (sautés quand désactivés : un index présent
+        # dans l'histogramme donne alors forcément un masque non vide)
+        mask = layer_masks[li]
+        if do_morph:
+            mask = _morph_open_close(mask, open_iters=morph_open, close_iters=morph_close)
+        if do_area:
+            mask = _remove_small_components(mask, min_area=min_area)
 
-        # Nettoyage morpho + bruit
-        mask = _morph_open_close(mask, open_iters=morph_open, close_iters=morph_close)
-        mask = _remove_small_components(mask, min_area=min_area)
-
-        if mask.sum() == 0:
+        if (do_morph or do_area) and not cv2.countNonZero(mask):
             continue
 
         union_mask |= mask
+        kept_masks.append(mask)
 
-        bmp_name = f"frame_{frame_id}_c{li:02d}.bmp"
-        bmp_path = bmp_dir / bmp_name
-        _write_bmp_bw(bmp_path, mask)
-
+        layer_id = idx if locked else li
         layers_meta.append(
             {
-                "layer_index": li,
+                "layer_index": layer_id,
                 "palette_index": idx,
                 "rgb": [int(rgb[0]), int(rgb[1]), int(rgb[2])],
-                "bmp": bmp_name,
+                "bmp": f"frame_{frame_id}_c{layer_id:02d}.bmp",
             }
         )
 
-    # Preview union (pour compat preview & pipeline existant)
-    preview_bmp = bmp_dir / f"frame_{frame_id}.bmp"
-    if union_mask.sum() == 0:
-        # frame vide → blanc
-        Image.new("L", img_rgb.size, 255).save(preview_bmp)
-    else:
-        _write_bmp_bw(preview_bmp, union_mask)
-
     frame_manifest = {
         "frame": f"frame_{frame_id}",
-        "source_png": png_path.name,
+        "source_png": png_name,
         "n_colors": int(n_colors),
         "background_palette_index": int(bg_idx),
         "layers": layers_meta,
-        "preview_bmp": preview_bmp.name,
+        "preview_bmp": f"frame_{frame_id}.bmp",
+    }
+    return _ArcadeLayers(frame_id, kept_masks, union_mask, frame_manifest)
+
+
+def _write_arcade_layers(bmp_dir: Path, layers: _ArcadeLayers) -> Dict[str, Any]:
+    """
+    Écrit les couches arcade d'une frame :
+    - frame_XXXX_cYY.bmp
+    - frame_XXXX.bmp (union preview)
+    - frame_XXXX_layers.json
+    """
+    layers_meta = layers.manifest["layers"]
+    for meta, mask in zip(layers_meta, layers.layer_masks):
+        _write_bmp_bw(bmp_dir / meta["bmp"], mask)
+
+    # Preview union (pour compat preview & pipeline existant)
+    preview_bmp = bmp_dir / layers.manifest["preview_bmp"]
+    # toujours un nouveau fichier : une preview d'un run précédent peut être
+    # un lien dur vers une couche (sinon on réécrirait aussi la couche)
+    preview_bmp.unlink(missing_ok=True)
+    if len(layers_meta) == 1:
+        # une seule couche : union == couche, lien dur au lieu d'un 2e encodage
+        layer_bmp = bmp_dir / layers_meta[0]["bmp"]
+        try:
+            preview_bmp.hardlink_to(layer_bmp)
+        except OSError:
+            shutil.copyfile(layer_bmp, preview_bmp)
+    else:
+        # frame vide → masque nul → BMP tout blanc
+        _write_bmp_bw(preview_bmp, layers.union_mask)
+
+    manifest_path = bmp_dir / f"frame_{layers.frame_id}_layers.json"
+    _write_json(manifest_path, layers.manifest)
+
+    return layers.manifest
+
+
+def _generate_arcade_layers_for_frame(
+    png_path: Path,
+    bmp_dir: Path,
+    *,
+    n_colors: int,
+    min_area: int,
+    morph_open: int,
+    morph_close: int,
+    palette: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Génère les couches arcade d'une frame (lecture + calcul + écriture) ;
+    unité de travail des processus en mode parallèle.
+    """
+    layers = _compute_arcade_layers(
+        _load_rgb(png_path),
+        png_path.name,
+        n_colors=n_colors,
+        min_area=min_area,
+        morph_open=morph_open,
+        morph_close=morph_close,
+        palette=palette,
+    )
+    return _write_arcade_layers(bmp_dir, layers)
+
+
+def _arcade_pipelined(
+    png_files: List[Path],
+    bmp_dir: Path,
+    compute: Callable[[Image.Image, str], _ArcadeLayers],
+    *,
+    ahead: int = _PIPELINE_DEPTH,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Mode séquentiel en chaîne à 3 étages : décodage PNG (thread) -> calcul
+    (thread appelant) -> écriture BMP/JSON (thread). Files bornées à `ahead`
+    frames ; manifests rendus dans l'ordre, une fois la frame écrite.
+    """
+    with ThreadPoolExecutor(max_workers=1) as reader, ThreadPoolExecutor(max_workers=1) as writer:
+        paths = iter(png_files)
+        decoding: Deque[Future] = deque(reader.submit(_load_rgb, p) for p in islice(paths, ahead))
+        writing: Deque[Future] = deque()
+        try:
+            for png_path in png_files:
+                img_rgb = decoding.popleft().result()
+                nxt = next(paths, None)
+                if nxt is not None:
+                    decoding.append(reader.submit(_load_rgb, nxt))
+
+                writing.append(writer.submit(_write_arcade_layers, bmp_dir, compute(img_rgb, png_path.name)))
+                while writing and (len(writing) > ahead or writing[0].done()):
+                    yield writing.popleft().result()
+            while writing:
+                yield writing.popleft().result()
+        finally:
+            for fut in (*decoding, *writing):
+                fut.cancel()
+
+
+def _run_bitmap_on_stream(
+    project: str,
+    frames: Iterable[Tuple[int, bytes]],
+    *,
+    mode: str,
+    threshold: int,
+    use_thinning: bool,
+    engine: str,
+    max_frames: Optional[int],
+    arcade_kwargs: Dict[str, Any],
+    arcade_palette_reuse: bool,
+    progress_cb: Optional[ProgressCallback],
+    cancel_cb: Optional[CancelCallback],
+) -> StepResult:
+    """
+    run_bitmap_step sur des frames en mémoire (run_ffmpeg_stream_step) :
+    mêmes sorties que le chemin disque, traitement séquentiel frame par frame
+    (total inconnu à l'avance).
+    """
+    step_name = "bitmap"
+    arcade = mode.lower() == "arcade"
+    bmp_dir = PROJECTS_ROOT / project / "bmp"
+    bmp_dir.mkdir(parents=True, exist_ok=True)
+
+    global_manifest: Dict[str, Any] = {
+        "project": project,
+        "mode": "arcade",
+        "n_colors": int(arcade_kwargs["n_colors"]),
+        "min_area": int(arcade_kwargs["min_area"]),
+        "morph_open": int(arcade_kwargs["morph_open"]),
+        "morph_close": int(arcade_kwargs["morph_close"]),
+        "frames": [],
     }
+    if arcade_palette_reuse:
+        global_manifest["palette_locked"] = True
+    palette: Optional[List[int]] = None
 
-    manifest_path = bmp_dir / f"frame_{frame_id}_layers.json"
-    manifest_path.write_text(json.dumps(frame_manifest, indent=2), encoding="utf-8")
+    if max_frames is not None:
+        frames = islice(frames, max_frames)
+
+    count = 0
+    try:
+        for idx, data in frames:
+            if _cancelled(cancel_cb):
+                return StepResult(False, "Bitmap computation canceled.", bmp_dir)
+
+            png_name = f"frame_{idx:04d}.png"
+            if arcade:
+                img_rgb = _decode_rgb(data)
+                if arcade_palette_reuse and palette is None:
+                    palette = _quantize_image(img_rgb, n_colors=arcade_kwargs["n_colors"]).getpalette()
+                layers = _compute_arcade_layers(img_rgb, png_name, palette=palette, **arcade_kwargs)
+                frame_manifest = _write_arcade_layers(bmp_dir, layers)
+                global_manifest["frames"].append(frame_manifest)
+                out_path = bmp_dir / frame_manifest["preview_bmp"]
+            else:
+                out_path = bmp_dir / f"frame_{idx:04d}.bmp"
+                _convert_png_to_bmp(None, out_path, threshold, use_thinning, data=data, engine=engine)
+
+            count += 1
+            if progress_cb is not None:
+                progress_cb(
+                    FrameProgress(
+                        step_name=step_name,
+                        message=f"Frame {count}" + (" (arcade layers)" if arcade else ""),
+                        frame_index=count,
+                        total_frames=max_frames,
+                        frame_path=out_path,
+                    )
+                )
+    except Exception as e:
+        return StepResult(success=False, message=f"Erreur Bitmap : {e}", output_dir=None)
 
-    return frame_manifest
+    if not count:
+        return StepResult(False, "Aucune frame reçue du flux FFmpeg.", bmp_dir)
+
+    if arcade:
+        _write_json(bmp_dir / "_layers_manifest.json", global_manifest)
+        msg = (
+            "Arcade BMP images computed in: "
+            f"{bmp_dir} ({count} frames, layers + preview union + manifests)"
+        )
+    else:
+        msg = f"BMP images computed in: {bmp_dir} ({count} frames)"
+    return StepResult(success=True, message=msg, output_dir=bmp_dir)
 
 
 # ----------------------------------------------------------------------
@@ -257,17 +484,30 @@ def run_bitmap_step(
     arcade_min_area: int = 12,
     arcade_morph_open: int = 1,
     arcade_morph_close: int = 0,
+    arcade_workers: Optional[int] = 1,
+    arcade_palette_reuse: bool = False,
+    frames: Optional[Iterable[Tuple[int, bytes]]] = None,
+    engine: str = "magick",
 ) -> StepResult:
     """
     Step pipeline : PNG -> BMP pour un projet donné.
 
     Classic (par défaut):
       - comportement inchangé : convert_project_frames_to_bmp(... threshold, thinning ...)
+      - engine="numpy" : seuillage en process au lieu d'ImageMagick (thinning : ImageMagick)
 
     Arcade:
       - quantification couleurs + séparation en couches BMP
       - écrit aussi un BMP union "frame_XXXX.bmp" pour compat preview
       - écrit des manifests JSON
+      - arcade_workers : frames traitées en parallèle (processus) ;
+        1 = séquentiel (défaut), None/0 = nb de CPU (opt-in, pool en "spawn")
+      - arcade_palette_reuse : palette calculée sur la 1re frame puis réutilisée
+        pour toutes les frames (plus rapide, couleurs stables d'une frame à l'autre) ;
+        layer_index / _cYY = index palette, donc stables sur toute la vidéo
+
+    frames : (index, octets PNG) en mémoire (run_ffmpeg_stream_step) au lieu
+    des PNG de projects/<project>/frames ; None = lecture disque (défaut)
     """
     step_name = "bitmap"
 
@@ -282,6 +522,26 @@ def run_bitmap_step(
             )
         )
 
+    if frames is not None:
+        return _run_bitmap_on_stream(
+            project,
+            frames,
+            mode=mode,
+            threshold=threshold,
+            use_thinning=use_thinning,
+            engine=engine,
+            max_frames=max_frames,
+            arcade_kwargs={
+                "n_colors": arcade_n_colors,
+                "min_area": arcade_min_area,
+                "morph_open": arcade_morph_open,
+                "morph_close": arcade_morph_close,
+            },
+            arcade_palette_reuse=arcade_palette_reuse,
+            progress_cb=progress_cb,
+            cancel_cb=cancel_cb,
+        )
+
     # ------------------------------------------------------------
     # Classic path : inchangé
     # ------------------------------------------------------------
@@ -312,6 +572,7 @@ def run_bitmap_step(
                 max_frames=max_frames,
                 frame_callback=on_frame_done,
                 cancel_cb=cancel_cb,
+                engine=engine,
             )
         except Exception as e:
             msg = f"Erreur Bitmap : {e}"
@@ -359,45 +620,80 @@ def run_bitmap_step(
         "frames": [],
     }
 
+    shared_palette: Optional[List[int]] = None
+    if arcade_palette_reuse:
+        shared_palette = _quantize_image(_load_rgb(png_files[0]), n_colors=arcade_n_colors).getpalette()
+        global_manifest["palette_locked"] = True
+
     total = len(png_files)
     last_path: Optional[Path] = None
 
-    for i, png_path in enumerate(png_files, start=1):
-        if _cancelled(cancel_cb):
-            return StepResult(
-                success=False,
-                message="Bitmap computation canceled.",
-                output_dir=bmp_dir,
-            )
-
-        frame_manifest = _generate_arcade_layers_for_frame(
-            png_path=png_path,
-            bmp_dir=bmp_dir,
-            n_colors=arcade_n_colors,
-            min_area=arcade_min_area,
-            morph_open=arcade_morph_open,
-            morph_close=arcade_morph_close,
+    # frames indépendantes : calcul en parallèle, manifests consommés dans l'ordre
+    gen_frame = partial(
+        _generate_arcade_layers_for_frame,
+        bmp_dir=bmp_dir,
+        n_colors=arcade_n_colors,
+        min_area=arcade_min_area,
+        morph_open=arcade_morph_open,
+        morph_close=arcade_morph_close,
+        palette=shared_palette,
+    )
+    n_workers = _resolve_workers(arcade_workers, total)
+    executor: Optional[ProcessPoolExecutor] = None
+    if n_workers > 1:
+        # spawn : un fork depuis un thread (GUI Qt, threads OpenCV) n'est pas sûr
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        manifests = executor.map(gen_frame, png_files, chunksize=4)
+    else:
+        # séquentiel : décodage et écritures recouvrent le calcul
+        manifests = _arcade_pipelined(
+            png_files,
+            bmp_dir,
+            partial(
+                _compute_arcade_layers,
+                n_colors=arcade_n_colors,
+                min_area=arcade_min_area,
+                morph_open=arcade_morph_open,
+                morph_close=arcade_morph_close,
+                palette=shared_palette,
+            ),
         )
-        global_manifest["frames"].append(frame_manifest)
-
-        # pour la preview existante : on pointe sur le preview union frame_XXXX.bmp
-        last_path = bmp_dir / frame_manifest["preview_bmp"]
-
-        if progress_cb is not None:
-            progress_cb(
-                FrameProgress(
-                    step_name=step_name,
-                    message=f"Frame {i}/{total} (arcade layers)",
-                    frame_index=i,
-                    total_frames=total,
-                    frame_path=last_path,
+
+    try:
+        for i in range(1, total + 1):
+            if _cancelled(cancel_cb):
+                return StepResult(
+                    success=False,
+                    message="Bitmap computation canceled.",
+                    output_dir=bmp_dir,
                 )
-            )
 
-    (bmp_dir / "_layers_manifest.json").write_text(
-        json.dumps(global_manifest, indent=2),
-        encoding="utf-8",
-    )
+            frame_manifest = next(manifests)
+            global_manifest["frames"].append(frame_manifest)
+
+            # pour la preview existante : on pointe sur le preview union frame_XXXX.bmp
+            last_path = bmp_dir / frame_manifest["preview_bmp"]
+
+            if progress_cb is not None:
+                progress_cb(
+                    FrameProgress(
+                        step_name=step_name,
+                        message=f"Frame {i}/{total} (arcade layers)",
+                        frame_index=i,
+                        total_frames=total,
+                        frame_path=last_path,
+                    )
+                )
+    finally:
+        if executor is not None:
+            # pas d'attente des frames en vol : l'annulation rend la main tout de suite
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            manifests.close()
+
+    _write_json(bmp_dir / "_layers_manifest.json", global_manifest)
 
     msg = (
         "Arcade BMP images computed in: "
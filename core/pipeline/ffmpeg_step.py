@@ -3,9 +3,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Any
+from typing import Any, Iterator, Optional, Tuple
 
-from core.ffmpeg_extract import extract_frames
+from core.config import PROJECTS_ROOT
+from core.ffmpeg_extract import extract_frames, iter_frames
 from core.pipeline.base import StepResult, FrameProgress, ProgressCallback, CancelCallback
 
 
@@ -15,6 +16,7 @@ class FfmpegParams:
     project: str
     fps: int
     max_frames: int = 0  # 0 = toutes
+    hwaccel: Optional[str] = None  # None = décodage logiciel
 
 
 def run_ffmpeg_step(
@@ -23,6 +25,7 @@ def run_ffmpeg_step(
     fps: int,
     max_frames: int = 0,
     scale: float | None = None,
+    hwaccel: str | None = None,
     progress_cb: Optional[ProgressCallback] = None,
     cancel_cb: Optional[CancelCallback] = None,
     # compat: si d'anciens callers passent des kwargs inattendus, on ignore
@@ -32,6 +35,7 @@ def run_ffmpeg_step(
     Step FFmpeg: extrait des frames PNG dans projects/<project>/frames.
 
     - max_frames: 0 = toutes (comportement historique)
+    - hwaccel: décodage matériel FFmpeg ("auto", "cuda", ...), None = logiciel
     """
     if cancel_cb and cancel_cb():
         return StepResult(False, "Canceled.")
@@ -41,8 +45,21 @@ def run_ffmpeg_step(
         project=str(project),
         fps=int(fps),
         max_frames=int(max_frames or 0),
+        hwaccel=hwaccel or None,
     )
 
+    def on_frame_done(idx: int, total: Optional[int], _frames_dir: Path) -> None:
+        if progress_cb:
+            progress_cb(
+                FrameProgress(
+                    step_name="ffmpeg",
+                    message=f"Frame {idx}/{total}" if total else f"Frame {idx}",
+                    frame_index=idx,
+                    total_frames=total,
+                    frame_path=None,
+                )
+            )
+
     try:
         frames_dir = extract_frames(
             p.video_path,
@@ -50,8 +67,13 @@ def run_ffmpeg_step(
             p.fps,
             max_frames=p.max_frames,
             scale=scale,
+            hwaccel=p.hwaccel,
+            frame_callback=on_frame_done if progress_cb else None,
+            cancel_cb=cancel_cb,
         )
     except Exception as exc:  # noqa: BLE001
+        if cancel_cb and cancel_cb():
+            return StepResult(False, "Canceled.")
         return StepResult(False, f"Erreur FFmpeg : {exc}")
 
     frames = sorted(frames_dir.glob("frame_*.png"))
@@ -69,4 +91,46 @@ def run_ffmpeg_step(
             )
         )
 
-    return StepResult(True, f"Frames computed in: {frames_dir} ({len(frames)} frames)")
+    return StepResult(
+        True,
+        f"Frames computed in: {frames_dir} ({len(frames)} frames)",
+        frames_dir,
+        frames=frames,
+    )
+
+
+def run_ffmpeg_stream_step(
+    video_path: Path | str,
+    project: str,
+    fps: int,
+    max_frames: int = 0,
+    scale: float | None = None,
+    hwaccel: str | None = None,
+    *,
+    materialize: bool = False,
+    cancel_cb: Optional[CancelCallback] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Step FFmpeg en flux : rend (index 1-based, octets PNG) sans passer par le disque,
+    à donner à run_bitmap_step(frames=...).
+
+    - materialize=True : écrit aussi projects/<project>/frames/frame_XXXX.png
+      (mêmes octets, pas de ré-encodage) pour les steps qui relisent les PNG
+      (arcade_lines, preview)
+    - lève les erreurs FFmpeg (générateur : pas de StepResult)
+    """
+    frames_dir = PROJECTS_ROOT / str(project) / "frames"
+    if materialize:
+        frames_dir.mkdir(parents=True, exist_ok=True)
+
+    for idx, data in iter_frames(
+        Path(video_path),
+        int(fps),
+        max_frames=int(max_frames or 0),
+        scale=scale,
+        hwaccel=hwaccel or None,
+        cancel_cb=cancel_cb,
+    ):
+        if materialize:
+            (frames_dir / f"frame_{idx:04d}.png").write_bytes(data)
+        yield idx, data
@@ -1,24 +1,29 @@
 # core/pipeline/full_pipeline_step.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any, Callable, Optional
-import inspect
+import os
+import queue
+import threading
 
+from core.bitmap_convert import _convert_png_to_bmp
 from core.config import PROJECTS_ROOT
+from core.ffmpeg_extract import probe_frame_rate
 from core.pipeline.base import FrameProgress, ProgressCallback, StepResult, CancelCallback
 
 from core.pipeline.ffmpeg_step import run_ffmpeg_step
-from core.pipeline.bitmap_step import run_bitmap_step
-from core.pipeline.potrace_step import run_potrace_step
+from core.pipeline.potrace_step import _run_potrace_bmp_to_svg
 from core.pipeline.ilda_step import run_ilda_step
 from core.pipeline.arcade_lines_step import run_arcade_lines_step
+from core.pipeline.step_specs import filter_kwargs
 
 
 @dataclass(frozen=True)
 class _Params:
-    video_path: Path
+    video_path: str  # Path construit par le step FFmpeg, au contact du disque
     project: str
     fps: int
     threshold: int
@@ -26,6 +31,35 @@ class _Params:
     max_frames: int  # 0 = all
     ilda_mode: str
     arcade_params: Optional[dict[str, Any]]
+    bitmap_engine: str = "magick"
+
+    def __post_init__(self) -> None:
+        # normalisation des entrées callers (str/float/None...) en un seul endroit
+        set_ = object.__setattr__
+        set_(self, "video_path", os.fspath(self.video_path))
+        set_(self, "project", str(self.project))
+        set_(self, "fps", int(self.fps))
+        set_(self, "threshold", int(self.threshold))
+        set_(self, "use_thinning", bool(self.use_thinning))
+        set_(self, "max_frames", int(self.max_frames) if self.max_frames is not None else 0)
+        set_(self, "ilda_mode", str(self.ilda_mode))
+        set_(self, "arcade_params", dict(self.arcade_params) if self.arcade_params else None)
+        set_(self, "bitmap_engine", str(self.bitmap_engine).strip().lower())
+
+
+@dataclass(frozen=True)
+class _Stage:
+    """
+    Étape séquentielle de l'orchestrateur.
+
+    - label : step_name par défaut des FrameProgress (_wrap_progress)
+    - run : appelé avec progress_cb= / cancel_cb= seulement (le reste lié par partial)
+    - fail_prefix : préfixe du message d'échec, None si le message l'a déjà
+    """
+
+    label: str
+    run: Callable[..., StepResult]
+    fail_prefix: Optional[str] = None
 
 
 def _is_cancelled(cancel_cb: Optional[CancelCallback]) -> bool:
@@ -54,18 +88,274 @@ def _wrap_progress(
     return _cb
 
 
+@lru_cache(maxsize=64)
+def _project_root(root: Path | str, project: str) -> Path:
+    # racine incluse dans la clé : un PROJECTS_ROOT différent ne relit jamais une entrée périmée
+    return Path(root) / project
+
+
 def _frames_dir(project: str) -> Path:
-    return Path(PROJECTS_ROOT) / project / "frames"
+    return _project_root(PROJECTS_ROOT, project) / "frames"
+
+
+def _frame_sort_key(name: str) -> tuple[int, str]:
+    # ordre naturel : frame_10000.png après frame_9999.png
+    num = name[6:-4]
+    return (int(num), name) if num.isdigit() else (-1, name)
 
 
 def _find_png_frames(project: str) -> list[Path]:
     d = _frames_dir(project)
-    if not d.exists():
+    # scandir : un seul parcours du dossier, filtrage sur le nom (pas de fnmatch)
+    try:
+        with os.scandir(d) as it:
+            names = [e.name for e in it if e.name.endswith(".png")]
+    except OSError:
         return []
-    frames = sorted(d.glob("frame_*.png"))
-    if frames:
-        return frames
-    return sorted(d.glob("*.png"))
+    frames = sorted((n for n in names if n.startswith("frame_")), key=_frame_sort_key)
+    if not frames:
+        frames = sorted(names)
+    return [d / n for n in frames]
+
+
+# Taille des files entre stages : borne la mémoire et l'avance d'un stage sur le suivant
+_STAGE_QUEUE_SIZE = 32
+_POLL_S = 0.1
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """put() bloquant mais interruptible : False si la pipeline est arrêtée."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_S)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Optional[Path]:
+    """get() interruptible : None en fin de flux ou si la pipeline est arrêtée."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_S)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _run_classic_stages(
+    p: _Params,
+    ffmpeg_kwargs: dict[str, Any],
+    progress_cb: Optional[ProgressCallback],
+    cancel_cb: Optional[CancelCallback],
+    *,
+    workers: int = 1,
+) -> StepResult:
+    """
+    FFmpeg -> Bitmap -> Potrace en producteur/consommateur.
+
+    - FFmpeg pousse chaque PNG dès que -progress signale la frame suivante,
+      Bitmap et Potrace consomment frame par frame (files bornées, sentinelle None)
+    - `workers` threads par stage Bitmap / Potrace : ImageMagick et Potrace sont
+      des sous-processus, les frames indépendantes tournent donc en parallèle
+      (l'ordre d'arrivée n'importe pas : l'export ILDA trie les SVG)
+    - cancel_cb n'est interrogé que depuis le thread appelant, qui relaie vers
+      un Event partagé ; idem pour les FrameProgress (un seul thread de dispatch)
+    - StepResult d'échec déjà préfixé par le stage fautif ("Echec Bitmap: ...")
+    """
+    project_root = _project_root(PROJECTS_ROOT, p.project)
+    bmp_dir = project_root / "bmp"
+    svg_dir = project_root / "svg"
+    frames_dir = _frames_dir(p.project)
+    limit: Optional[int] = None if p.max_frames == 0 else p.max_frames
+
+    # Nettoyage: éviter que d'anciens SVG faussent l'export ILDA.
+    for old_svg in svg_dir.glob("frame_*.svg"):
+        try:
+            old_svg.unlink()
+        except Exception:
+            pass
+
+    stop = threading.Event()
+    events: queue.Queue = queue.Queue()
+    png_q: queue.Queue = queue.Queue(maxsize=_STAGE_QUEUE_SIZE)
+    bmp_q: queue.Queue = queue.Queue(maxsize=_STAGE_QUEUE_SIZE)
+    lock = threading.Lock()
+    failures: list[tuple[str, str]] = []
+    totals: dict[str, Optional[int]] = {"frames": None}
+    done = {"bitmap": 0, "potrace": 0}
+    bitmap_running = [workers]
+
+    def fail(stage: str, msg: str) -> None:
+        # seule la 1re erreur compte : les autres stages s'arrêtent par ricochet
+        with lock:
+            if not stop.is_set():
+                failures.append((stage, msg))
+            stop.set()
+
+    # sans listener : aucun FrameProgress construit ni mis en file
+    listening = progress_cb is not None
+
+    def emit(stage: str, path: Path) -> None:
+        if not listening:
+            return
+        with lock:
+            done[stage] += 1
+            idx = done[stage]
+        total = totals["frames"]
+        events.put(
+            FrameProgress(
+                step_name=stage,
+                message=f"Frame {idx}/{total}" if total else f"Frame {idx}",
+                frame_index=idx,
+                total_frames=total,
+                frame_path=path,
+            )
+        )
+
+    def ffmpeg_stage() -> None:
+        sent: set[Path] = set()
+
+        def push(png: Path) -> bool:
+            if limit is not None and len(sent) >= limit:
+                return False
+            if not _put(png_q, png, stop):
+                return False
+            sent.add(png)
+            return True
+
+        def on_progress(fp: FrameProgress) -> None:
+            if listening:
+                events.put(fp)
+            if fp.total_frames:
+                totals["frames"] = fp.total_frames
+            # frame=N : frame_N peut encore être en cours d'écriture (muxer image2
+            # sur son propre thread) -> seules frame_0001..frame_N-1 sont sûres ;
+            # la dernière est reprise après la fin de run_ffmpeg_step
+            for k in range(len(sent) + 1, fp.frame_index or 0):
+                png = frames_dir / f"frame_{k:04d}.png"
+                if not png.exists() or not push(png):
+                    break
+
+        try:
+            res = run_ffmpeg_step(**ffmpeg_kwargs, progress_cb=on_progress, cancel_cb=stop.is_set)
+            if not res.success:
+                fail("ffmpeg", f"Echec FFmpeg: {res.message}")
+                return
+
+            # frames non signalées par -progress (fin d'extraction) : même liste qu'avant
+            png_frames = res.frames if res.frames is not None else _find_png_frames(p.project)
+            if not png_frames:
+                fail(
+                    "ffmpeg",
+                    f"Aucune frame PNG trouvée après FFmpeg. Attendu dans: {frames_dir}",
+                )
+                return
+            if limit is not None:
+                png_frames = png_frames[:limit]
+            totals["frames"] = len(png_frames)
+            for png in png_frames:
+                if png not in sent and not push(png):
+                    break
+        except Exception as e:
+            fail("ffmpeg", f"Echec FFmpeg: {e}")
+        finally:
+            # une sentinelle par worker bitmap
+            for _ in range(workers):
+                _put(png_q, None, stop)
+
+    def bitmap_stage() -> None:
+        try:
+            while (png := _get(png_q, stop)) is not None:
+                bmp = bmp_dir / f"{png.stem}.bmp"
+                _convert_png_to_bmp(png, bmp, p.threshold, p.use_thinning, engine=p.bitmap_engine)
+                emit("bitmap", bmp)
+                if not _put(bmp_q, bmp, stop):
+                    return
+        except Exception as e:
+            fail("bitmap", f"Echec Bitmap: {e}")
+        finally:
+            # le dernier worker bitmap sorti ferme le flux des workers potrace
+            with lock:
+                bitmap_running[0] -= 1
+                last = bitmap_running[0] == 0
+            if last:
+                for _ in range(workers):
+                    _put(bmp_q, None, stop)
+
+    def potrace_stage() -> None:
+        try:
+            while (bmp := _get(bmp_q, stop)) is not None:
+                svg = svg_dir / f"{bmp.stem}.svg"
+                _run_potrace_bmp_to_svg(bmp, svg)
+                emit("potrace", svg)
+        except Exception as e:
+            fail("potrace", f"Echec Potrace: {e}")
+
+    if listening:
+        events.put(FrameProgress(step_name="bitmap", message="Démarrage conversion bitmap…", frame_index=0))
+        events.put(FrameProgress(step_name="potrace", message="Démarrage vectorisation (Potrace)…", frame_index=0))
+
+    stages = [ffmpeg_stage] + [bitmap_stage] * workers + [potrace_stage] * workers
+    threads = [
+        threading.Thread(target=fn, name=f"lpip-{fn.__name__}-{i}", daemon=True)
+        for i, fn in enumerate(stages)
+    ]
+    for t in threads:
+        t.start()
+
+    # dispatch des progressions + relais d'annulation, depuis le thread appelant
+    cancelled = False
+    wrapped = {name: _wrap_progress(name, progress_cb) for name in ("ffmpeg", "bitmap", "potrace")}
+    try:
+        while any(t.is_alive() for t in threads) or not events.empty():
+            if not cancelled and _is_cancelled(cancel_cb):
+                cancelled = True
+                stop.set()
+            try:
+                fp = events.get(timeout=_POLL_S)
+            except queue.Empty:
+                continue
+            cb = wrapped.get(fp.step_name)
+            if cb is not None:
+                cb(fp)
+    finally:
+        # progress_cb / cancel_cb qui lève : les stages (et leurs sous-processus)
+        # s'arrêtent quand même avant que l'exception ne remonte
+        stop.set()
+        for t in threads:
+            t.join()
+
+    if cancelled:
+        return StepResult(False, "Canceled.")
+    if failures:
+        return StepResult(False, failures[0][1])
+    return StepResult(True, f"SVG computed in: {svg_dir}", svg_dir)
+
+
+def _run_stages(
+    stages: tuple[_Stage, ...],
+    progress_cb: Optional[ProgressCallback],
+    cancel_cb: Optional[CancelCallback],
+) -> StepResult:
+    """Enchaîne les stages ; s'arrête au 1er échec ou à l'annulation."""
+    res = StepResult(False, "Aucun stage.")
+    for st in stages:
+        if _is_cancelled(cancel_cb):
+            return StepResult(False, "Canceled.")
+        res = st.run(progress_cb=_wrap_progress(st.label, progress_cb), cancel_cb=cancel_cb)
+        if not res.success:
+            if st.fail_prefix:
+                return StepResult(False, f"{st.fail_prefix}: {res.message}")
+            return res
+    return res
 
 
 def run_full_pipeline_step(
@@ -81,6 +371,9 @@ def run_full_pipeline_step(
     fill_ratio: float = 0.95,
     min_rel_size: float = 0.01,
     arcade_params: Optional[dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    bitmap_engine: str = "magick",
+    clamp_fps: bool = False,
     progress_cb: Optional[ProgressCallback] = None,
     cancel_cb: Optional[CancelCallback] = None,
     # compat: anciens callers (thinning=...) etc.
@@ -89,13 +382,20 @@ def run_full_pipeline_step(
     """
     Orchestrateur "full pipeline".
 
-    - Classic : FFmpeg -> Bitmap -> Potrace -> ILDA
+    - Classic : FFmpeg -> Bitmap -> Potrace (en parallèle, frame par frame) -> ILDA
     - Arcade  : FFmpeg -> arcade_lines (et on s'arrête là)
 
     Points importants (stabilité):
     - N’importe aucun module fantôme.
     - Ne passe max_frames à run_ffmpeg_step que si son API l’accepte.
     - max_frames = 0 signifie "toutes".
+    - workers : frames converties / vectorisées en parallèle en classic
+      (None/0 = nb de CPU, 1 = une frame à la fois par stage)
+    - bitmap_engine : "magick" (défaut) ou "numpy" (seuillage en process,
+      sans ImageMagick quand use_thinning est off)
+    - clamp_fps : fps ramené à la cadence native de la vidéo (ffprobe) si
+      supérieur ; évite de traiter des frames dupliquées par FFmpeg, mais
+      change la cadence de l'ILDA produit -> opt-in
     """
 
     # Compat: thinning=... -> use_thinning
@@ -103,61 +403,54 @@ def run_full_pipeline_step(
         use_thinning = bool(_compat["thinning"])
 
     p = _Params(
-        video_path=Path(video_path),
-        project=str(project),
-        fps=int(fps),
-        threshold=int(threshold),
-        use_thinning=bool(use_thinning),
-        max_frames=int(max_frames) if max_frames is not None else 0,
-        ilda_mode=str(ilda_mode),
-        arcade_params=dict(arcade_params) if arcade_params else None,
+        video_path=video_path,
+        project=project,
+        fps=fps,
+        threshold=threshold,
+        use_thinning=use_thinning,
+        max_frames=max_frames,
+        ilda_mode=ilda_mode,
+        arcade_params=arcade_params,
+        bitmap_engine=bitmap_engine,
     )
 
     if _is_cancelled(cancel_cb):
         return StepResult(False, "Canceled.")
 
+    if clamp_fps:
+        native_fps = probe_frame_rate(p.video_path)
+        if native_fps is not None and p.fps > max(1, round(native_fps)):
+            clamped = max(1, round(native_fps))
+            if progress_cb is not None:
+                progress_cb(
+                    FrameProgress(
+                        step_name="ffmpeg",
+                        message=f"fps {p.fps} > cadence source ({native_fps:.3f}) : ramené à {clamped}",
+                    )
+                )
+            p = replace(p, fps=clamped)
+
     # ----------------------------
-    # Step 1: FFmpeg (always)
+    # Step 1: FFmpeg (always) : kwargs communs aux deux branches
     # ----------------------------
     ffmpeg_kwargs: dict[str, Any] = {
         "video_path": p.video_path,
         "project": p.project,
         "fps": p.fps,
-        "progress_cb": _wrap_progress("ffmpeg", progress_cb),
-        "cancel_cb": cancel_cb,
     }
 
-    # Passe max_frames à FFmpeg UNIQUEMENT si l'API le supporte (anti-régression).
-    try:
-        sig = inspect.signature(run_ffmpeg_step)
-        if "max_frames" in sig.parameters:
-            ffmpeg_kwargs["max_frames"] = (None if p.max_frames == 0 else p.max_frames)
-        if "scale" in sig.parameters and ffmpeg_scale is not None:
-            ffmpeg_kwargs["scale"] = float(ffmpeg_scale)
-    except Exception:
-        # Si signature() échoue pour une raison quelconque, on n'envoie rien.
-        pass
-
-    ffmpeg_res = run_ffmpeg_step(**ffmpeg_kwargs)
-    if not ffmpeg_res.success:
-        return StepResult(False, f"Echec FFmpeg: {ffmpeg_res.message}")
-
-    png_frames = _find_png_frames(p.project)
-    if not png_frames:
-        return StepResult(
-            False,
-            f"Aucune frame PNG trouvée après FFmpeg. Attendu dans: {_frames_dir(p.project)}",
-        )
+    # Passe max_frames / scale à FFmpeg UNIQUEMENT si l'API le supporte (anti-régression).
+    ffmpeg_kwargs["max_frames"] = (None if p.max_frames == 0 else p.max_frames)
+    if ffmpeg_scale is not None:
+        ffmpeg_kwargs["scale"] = float(ffmpeg_scale)
+    ffmpeg_kwargs = filter_kwargs(run_ffmpeg_step, ffmpeg_kwargs)
 
     mode = p.ilda_mode.strip().lower()
 
     # ----------------------------
-    # Arcade branch
+    # Arcade branch : FFmpeg -> arcade_lines (et on s'arrête là)
     # ----------------------------
     if mode == "arcade":
-        if _is_cancelled(cancel_cb):
-            return StepResult(False, "Canceled.")
-
         extra = dict(p.arcade_params or {})
 
         # Valeurs robustes par défaut (tu peux les surcharger via arcade_params)
@@ -170,65 +463,47 @@ def run_full_pipeline_step(
         # 0 ("toutes") -> None (API arcade_lines_step)
         arcade_max_frames: Optional[int] = None if p.max_frames == 0 else p.max_frames
 
-        arcade_res = run_arcade_lines_step(
-            p.project,
-            fps=p.fps,
-            max_frames=arcade_max_frames,
-            kpps=kpps,
-            ppf_ratio=ppf_ratio,
-            sample_color=sample_color,
-            invert_y=invert_y,
-            progress_cb=_wrap_progress("arcade_lines", progress_cb),
-            cancel_cb=cancel_cb,
-            **extra,
+        # run_ffmpeg_step échoue déjà s'il n'a produit aucune frame
+        stages: tuple[_Stage, ...] = (
+            _Stage("ffmpeg", partial(run_ffmpeg_step, **ffmpeg_kwargs), "Echec FFmpeg"),
+            _Stage(
+                "arcade_lines",
+                partial(
+                    run_arcade_lines_step,
+                    p.project,
+                    fps=p.fps,
+                    max_frames=arcade_max_frames,
+                    kpps=kpps,
+                    ppf_ratio=ppf_ratio,
+                    sample_color=sample_color,
+                    invert_y=invert_y,
+                    **extra,
+                ),
+                "Echec Arcade",
+            ),
         )
-        if not arcade_res.success:
-            return StepResult(False, f"Echec Arcade: {arcade_res.message}")
-        return arcade_res
+        return _run_stages(stages, progress_cb, cancel_cb)
 
     # ----------------------------
-    # Classic pipeline
+    # Classic pipeline : FFmpeg, Bitmap et Potrace se recouvrent (un seul stage),
+    # puis ILDA (normalisation globale sur tous les SVG -> après)
     # ----------------------------
-    if _is_cancelled(cancel_cb):
-        return StepResult(False, "Canceled.")
-
-    bitmap_res = run_bitmap_step(
-        p.project,
-        threshold=p.threshold,
-        use_thinning=p.use_thinning,
-        max_frames=(None if p.max_frames == 0 else p.max_frames),
-        mode="classic",
-        progress_cb=_wrap_progress("bitmap", progress_cb),
-        cancel_cb=cancel_cb,
-    )
-    if not bitmap_res.success:
-        return StepResult(False, f"Echec Bitmap: {bitmap_res.message}")
-
-    if _is_cancelled(cancel_cb):
-        return StepResult(False, "Canceled.")
-
-    potrace_res = run_potrace_step(
-        p.project,
-        max_frames=(None if p.max_frames == 0 else p.max_frames),
-        progress_cb=_wrap_progress("potrace", progress_cb),
-        cancel_cb=cancel_cb,
-    )
-    if not potrace_res.success:
-        return StepResult(False, f"Echec Potrace: {potrace_res.message}")
-
-    if _is_cancelled(cancel_cb):
-        return StepResult(False, "Canceled.")
-
-    ilda_res = run_ilda_step(
-        p.project,
-        fit_axis=fit_axis,
-        fill_ratio=fill_ratio,
-        min_rel_size=min_rel_size,
-        mode="classic",
-        progress_cb=_wrap_progress("ilda", progress_cb),
-        cancel_cb=cancel_cb,
+    stages = (
+        _Stage(
+            "ffmpeg",
+            partial(_run_classic_stages, p, ffmpeg_kwargs, workers=_resolve_workers(workers)),
+        ),
+        _Stage(
+            "ilda",
+            partial(
+                run_ilda_step,
+                p.project,
+                fit_axis=fit_axis,
+                fill_ratio=fill_ratio,
+                min_rel_size=min_rel_size,
+                mode="classic",
+            ),
+            "Echec ILDA",
+        ),
     )
-    if not ilda_res.success:
-        return StepResult(False, f"Echec ILDA: {ilda_res.message}")
-
-    return ilda_res
+    return _run_stages(stages, progress_cb, cancel_cb)
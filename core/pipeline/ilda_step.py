@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import json
+import os
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -10,6 +12,10 @@ from core.ilda_export import export_project_to_ilda
 from core.pipeline.base import StepResult, FrameProgress, ProgressCallback, CancelCallback
 
 
+# intervalle mini entre deux FrameProgress ILDA (signaux Qt côté GUI)
+_PROGRESS_MIN_INTERVAL_S = 0.05
+
+
 def run_ilda_step(
     project: str,
     fit_axis: str = "max",
@@ -37,26 +43,38 @@ def run_ilda_step(
                 frames = manifest.get("frames", [])
                 return len(frames)
 
-            svg_dir = project_root / "svg"
-            svg_files = sorted(svg_dir.glob("frame_*.svg"))
-            return len(svg_files)
+            # simple comptage : un parcours scandir, ni tri ni Path par entrée
+            with os.scandir(project_root / "svg") as it:
+                return sum(1 for e in it if e.name.startswith("frame_") and e.name.endswith(".svg"))
         except Exception:
             return None
 
     def check_cancel() -> bool:
         return bool(cancel_cb and cancel_cb())
 
+    last_pct = -1
+    last_t = 0.0
+
     def report_progress(frame_index: int, total_frames: int) -> None:
-        if progress_cb:
-            progress_cb(
-                FrameProgress(
-                    step_name=step_name,
-                    message=f"Frame {frame_index + 1}/{total_frames}",
-                    frame_index=frame_index + 1,
-                    total_frames=total_frames,
-                    frame_path=None,
-                )
+        # au plus un callback par pourcent (<= 101 événements GUI par export)
+        # et par _PROGRESS_MIN_INTERVAL_S ; la dernière frame passe toujours
+        nonlocal last_pct, last_t
+        pct = (frame_index + 1) * 100 // max(1, total_frames)
+        if pct == last_pct:
+            return
+        now = time.monotonic()
+        if now - last_t < _PROGRESS_MIN_INTERVAL_S and frame_index + 1 < total_frames:
+            return
+        last_pct, last_t = pct, now
+        progress_cb(
+            FrameProgress(
+                step_name=step_name,
+                message=f"Frame {frame_index + 1}/{total_frames}",
+                frame_index=frame_index + 1,
+                total_frames=total_frames,
+                frame_path=None,
             )
+        )
 
     try:
         out_path: Path = export_project_to_ilda(
@@ -67,7 +85,8 @@ def run_ilda_step(
             mode=mode,
             swap_rb=swap_rb,
             check_cancel=check_cancel,
-            report_progress=report_progress,
+            # sans callback, l'export ne rappelle rien frame par frame
+            report_progress=report_progress if progress_cb else None,
         )
 
         frame_count = count_frames(project, mode)
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+import os
 import subprocess
 import xml.etree.ElementTree as ET
 from pathlib import Path
@@ -113,11 +114,14 @@ def run_potrace_step(
     # ------------------------------------------------------------
     if mode.lower() != "arcade":
         # Nettoyage: éviter que d'anciens SVG faussent l'export ILDA.
-        for old_svg in svg_dir.glob("frame_*.svg"):
-            try:
-                old_svg.unlink()
-            except Exception:
-                pass
+        # Un seul parcours scandir, sans construire de Path par entrée.
+        with os.scandir(svg_dir) as it:
+            for e in it:
+                if e.name.startswith("frame_") and e.name.endswith(".svg"):
+                    try:
+                        os.unlink(e.path)
+                    except Exception:
+                        pass
 
         bmp_files = sorted(bmp_dir.glob("frame_[0-9][0-9][0-9][0-9].bmp"))
         if max_frames is not None:
@@ -0,0 +1,57 @@
+# core/pipeline/step_specs.py
+from __future__ import annotations
+
+import inspect
+from typing import Any, Callable, Dict, Mapping
+
+from .arcade_lines_step import run_arcade_lines_step
+from .bitmap_step import run_bitmap_step
+from .ffmpeg_step import run_ffmpeg_step
+from .ilda_step import run_ilda_step
+from .potrace_step import run_potrace_step
+
+
+_NAMED_KINDS = (
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    inspect.Parameter.KEYWORD_ONLY,
+)
+
+
+def _named_params(fn: Callable[..., Any]) -> frozenset[str]:
+    """
+    Noms des paramètres passables par mot-clé (hors *args / **kwargs).
+    Si signature() échoue pour une raison quelconque : ensemble vide (on n'envoie rien).
+    """
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return frozenset()
+    return frozenset(prm.name for prm in params if prm.kind in _NAMED_KINDS)
+
+
+# relevé une seule fois à l'import : aucune introspection pendant un run
+STEP_PARAMS: Dict[Callable[..., Any], frozenset[str]] = {
+    fn: _named_params(fn)
+    for fn in (
+        run_ffmpeg_step,
+        run_bitmap_step,
+        run_potrace_step,
+        run_ilda_step,
+        run_arcade_lines_step,
+    )
+}
+
+
+def step_params(fn: Callable[..., Any]) -> frozenset[str]:
+    params = STEP_PARAMS.get(fn)
+    if params is None:
+        params = STEP_PARAMS[fn] = _named_params(fn)
+    return params
+
+
+def filter_kwargs(fn: Callable[..., Any], kwargs: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Ne garde que les kwargs que `fn` déclare (compat entre versions d'API des steps).
+    """
+    accepted = step_params(fn)
+    return {k: v for k, v in kwargs.items() if k in accepted}
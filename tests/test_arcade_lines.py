@@ -0,0 +1,25 @@
+# tests/test_arcade_lines.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.pipeline.arcade_lines_step import _zs_thinning
+
+
+def test_zs_thinning_reduces_thick_bar_to_one_pixel_line():
+    img = np.zeros((20, 40), dtype=np.uint8)
+    img[8:13, 5:35] = 1
+
+    skel = _zs_thinning(img)
+    assert skel.dtype == np.uint8
+    assert skel.sum() > 0
+    # every column of the bar keeps at most one pixel
+    assert (skel[:, 8:32].sum(axis=0) <= 1).all()
+    # thinning never adds pixels
+    assert not (skel & (1 - img)).any()
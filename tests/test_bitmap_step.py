@@ -0,0 +1,107 @@
+# tests/test_bitmap_step.py
+
+import io
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import core.pipeline.bitmap_step as bitmap_step
+from core.bitmap_convert import _convert_png_to_bmp
+from core.ffmpeg_extract import _read_png
+from core.pipeline.bitmap_step import _remove_small_components
+
+
+def test_remove_small_components_uses_4_connectivity():
+    mask = np.zeros((10, 10), dtype=np.uint8)
+    mask[1:4, 1:4] = 1  # 9 px
+    # diagonal staircase: 3 separate 1-px components in 4-connectivity
+    mask[6, 6] = mask[7, 7] = mask[8, 8] = 1
+
+    out = _remove_small_components(mask, min_area=2)
+    assert out.dtype == np.uint8
+    assert out[1:4, 1:4].all()
+    assert out.sum() == 9
+
+    assert _remove_small_components(mask, min_area=10).sum() == 0
+    assert _remove_small_components(mask, min_area=1) is mask
+
+
+def test_palette_reuse_keeps_layer_ids_stable(tmp_path, monkeypatch):
+    frames = tmp_path / "proj" / "frames"
+    frames.mkdir(parents=True)
+    img = np.zeros((24, 24, 3), dtype=np.uint8)
+    img[2:10, 2:10] = (255, 0, 0)
+    img[14:22, 14:22] = (0, 255, 0)
+    Image.fromarray(img).save(frames / "frame_0001.png")
+    img[2:10, 2:10] = 0  # red square gone on frame 2
+    Image.fromarray(img).save(frames / "frame_0002.png")
+
+    monkeypatch.setattr(bitmap_step, "PROJECTS_ROOT", tmp_path)
+    res = bitmap_step.run_bitmap_step(
+        "proj", 50, False, arcade_n_colors=4, arcade_workers=1, arcade_palette_reuse=True
+    )
+    assert res.success
+
+    manifest = json.loads((tmp_path / "proj" / "bmp" / "_layers_manifest.json").read_text())
+    assert manifest["palette_locked"] is True
+    f1, f2 = ({layer["palette_index"]: layer for layer in fr["layers"]} for fr in manifest["frames"])
+    assert len(f1) == 2 and len(f2) == 1
+    # the surviving (green) layer keeps its id and _cYY suffix across frames
+    (idx,) = f2
+    assert f2[idx]["layer_index"] == f1[idx]["layer_index"] == idx
+    assert f2[idx]["bmp"] == f"frame_0002_c{idx:02d}.bmp"
+
+
+def test_in_memory_frames_match_disk_frames(tmp_path, monkeypatch):
+    frames = tmp_path / "proj" / "frames"
+    frames.mkdir(parents=True)
+    img = np.zeros((24, 24, 3), dtype=np.uint8)
+    for i in range(1, 4):
+        img[2 * i:10 + 2 * i, 4:12] = (255, 40 * i, 0)
+        Image.fromarray(img).save(frames / f"frame_{i:04d}.png")
+
+    # image2pipe: PNGs back to back, split again on chunk boundaries
+    pngs = sorted(frames.glob("*.png"))
+    stream = io.BytesIO(b"".join(p.read_bytes() for p in pngs))
+    datas = []
+    while (data := _read_png(stream)) is not None:
+        datas.append(data)
+    assert datas == [p.read_bytes() for p in pngs]
+
+    monkeypatch.setattr(bitmap_step, "PROJECTS_ROOT", tmp_path)
+    bmp_dir = tmp_path / "proj" / "bmp"
+    outputs = []
+    for source in (None, enumerate(datas, start=1)):
+        shutil.rmtree(bmp_dir, ignore_errors=True)
+        res = bitmap_step.run_bitmap_step("proj", 50, False, arcade_n_colors=4, arcade_workers=1, frames=source)
+        assert res.success
+        outputs.append({f.name: f.read_bytes() for f in bmp_dir.iterdir()})
+    assert outputs[0] == outputs[1]
+
+
+def test_numpy_engine_thresholds_and_fixes_polarity(tmp_path):
+    img = np.zeros((20, 30, 3), dtype=np.uint8)
+    img[5:10, 5:15] = (200, 200, 200)  # bright stroke on a black background
+    img[12:15, 5:15] = (0, 0, 120)  # dark blue: luma ~9, below 50%
+    png = tmp_path / "frame_0001.png"
+    Image.fromarray(img).save(png)
+
+    bmp = tmp_path / "frame_0001.bmp"
+    _convert_png_to_bmp(png, bmp, 50, False, engine="numpy")
+    out = np.asarray(Image.open(bmp).convert("L"))
+
+    # mostly dark frame -> inverted so Potrace traces the stroke (black on white)
+    expected = np.full((20, 30), 255, dtype=np.uint8)
+    expected[5:10, 5:15] = 0
+    assert np.array_equal(out, expected)
+
+    _convert_png_to_bmp(None, bmp, 50, False, engine="numpy", data=png.read_bytes())
+    assert np.array_equal(np.asarray(Image.open(bmp).convert("L")), expected)
@@ -0,0 +1,87 @@
+# tests/test_full_pipeline_step.py
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import core.pipeline.full_pipeline_step as fps_mod
+from core.pipeline.base import FrameProgress, StepResult
+
+
+def test_reported_frame_is_queued_only_on_next_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(fps_mod, "PROJECTS_ROOT", tmp_path)
+    frames_dir = tmp_path / "proj" / "frames"
+    for sub in ("frames", "bmp", "svg"):
+        (tmp_path / "proj" / sub).mkdir(parents=True)
+
+    report = ["start"]
+    queued: list[tuple] = []
+
+    def fake_ffmpeg(progress_cb=None, cancel_cb=None, **_kw):
+        frames = []
+        for n in (1, 2, 3):
+            png = frames_dir / f"frame_{n:04d}.png"
+            png.write_bytes(b"png")
+            frames.append(png)
+            report[0] = n
+            progress_cb(FrameProgress(step_name="ffmpeg", frame_index=n, total_frames=3))
+        report[0] = "done"
+        return StepResult(True, "ok", frames_dir, frames=frames)
+
+    real_put = fps_mod._put
+
+    def recording_put(q, item, stop):
+        if isinstance(item, Path) and item.suffix == ".png":
+            queued.append((report[0], item.name))
+        return real_put(q, item, stop)
+
+    monkeypatch.setattr(fps_mod, "run_ffmpeg_step", fake_ffmpeg)
+    monkeypatch.setattr(fps_mod, "_put", recording_put)
+    monkeypatch.setattr(fps_mod, "_convert_png_to_bmp", lambda *a, **k: None)
+    monkeypatch.setattr(fps_mod, "_run_potrace_bmp_to_svg", lambda *a, **k: None)
+
+    p = fps_mod._Params(
+        video_path="in.mp4", project="proj", fps=25, threshold=60,
+        use_thinning=False, max_frames=0, ilda_mode="classic", arcade_params=None,
+    )
+    res = fps_mod._run_classic_stages(p, {}, lambda fp: None, None)
+
+    assert res.success, res.message
+    # frame=N ne libère que frame_N-1 ; la dernière part après la fin de FFmpeg
+    assert queued == [
+        (2, "frame_0001.png"),
+        (3, "frame_0002.png"),
+        ("done", "frame_0003.png"),
+    ]
+
+
+def test_raising_progress_cb_stops_all_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(fps_mod, "PROJECTS_ROOT", tmp_path)
+    for sub in ("frames", "bmp", "svg"):
+        (tmp_path / "proj" / sub).mkdir(parents=True)
+
+    def endless_ffmpeg(progress_cb=None, cancel_cb=None, **_kw):
+        n = 0
+        while not cancel_cb():
+            n += 1
+            progress_cb(FrameProgress(step_name="ffmpeg", frame_index=n))
+        return StepResult(False, "Canceled.")
+
+    monkeypatch.setattr(fps_mod, "run_ffmpeg_step", endless_ffmpeg)
+
+    def boom(fp):
+        raise RuntimeError("listener failed")
+
+    p = fps_mod._Params(
+        video_path="in.mp4", project="proj", fps=25, threshold=60,
+        use_thinning=False, max_frames=0, ilda_mode="classic", arcade_params=None,
+    )
+    with pytest.raises(RuntimeError, match="listener failed"):
+        fps_mod._run_classic_stages(p, {}, boom, None)
+    assert not [t for t in threading.enumerate() if t.name.startswith("lpip-")]
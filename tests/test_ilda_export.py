@@ -0,0 +1,55 @@
+# tests/test_ilda_export.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import core.ilda_export as ilda_export
+
+
+def test_polyline_cache_skips_unchanged_svgs(tmp_path, monkeypatch):
+    svg_dir = tmp_path / "proj" / "svg"
+    svg_dir.mkdir(parents=True)
+    for i in range(3):
+        (svg_dir / f"frame_{i + 1:04d}.svg").write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            f'<path d="M0 0 C{i} 10 20 30 40 {i} L5 5z"/><path d=""/></svg>'
+        )
+    monkeypatch.setattr(ilda_export, "PROJECTS_ROOT", tmp_path)
+
+    parsed = []
+    real = ilda_export._svg_polylines
+    monkeypatch.setattr(ilda_export, "_svg_polylines", lambda data: parsed.append(data) or real(data))
+
+    first = ilda_export.export_project_to_ilda("proj").read_bytes()
+    assert len(parsed) == 3
+
+    # only the edited frame is parsed again; ILDA knobs do not invalidate the cache
+    (svg_dir / "frame_0002.svg").write_text('<svg><path d="M1 1 L9 9"/></svg>')
+    ilda_export.export_project_to_ilda("proj", fill_ratio=0.5)
+    assert len(parsed) == 4
+
+    (svg_dir / "frame_0002.svg").write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0 C1 10 20 30 40 1 L5 5z"/><path d=""/></svg>'
+    )
+    assert ilda_export.export_project_to_ilda("proj").read_bytes() == first
+    assert ilda_export.export_project_to_ilda("proj", use_cache=False).read_bytes() == first
+
+
+def test_polyline_cache_drops_entries_of_replaced_svgs(tmp_path, monkeypatch):
+    svg_dir = tmp_path / "proj" / "svg"
+    svg_dir.mkdir(parents=True)
+    monkeypatch.setattr(ilda_export, "PROJECTS_ROOT", tmp_path)
+    cache_dir = tmp_path / "proj" / ".cache" / "ilda"
+
+    # each "potrace run" rewrites every SVG with new content
+    for run in range(3):
+        for i in range(2):
+            (svg_dir / f"frame_{i + 1:04d}.svg").write_text(
+                f'<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0 L{run} {i}"/></svg>'
+            )
+        ilda_export.export_project_to_ilda("proj")
+        assert len(list(cache_dir.iterdir())) == 2
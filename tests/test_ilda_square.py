@@ -8,7 +8,7 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.step_ilda import write_demo_square
+from core.ilda_writer import write_test_square
 
 
 if __name__ == "__main__":
@@ -16,6 +16,6 @@ if __name__ == "__main__":
     out_dir.mkdir(parents=True, exist_ok=True)
 
     out_path = out_dir / "test_square.ild"
-    write_demo_square(out_path)
+    write_test_square(out_path)
 
     print(f"ILDA carré écrit dans : {out_path}")
@@ -0,0 +1,124 @@
+# tests/test_ilda_writer.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.ilda_preview import load_ilda_frames
+from core.ilda_writer import IldaFrame, IldaFrameArray, IldaPoint, write_ilda_file, write_ilda_file_memmap, write_ilda_file_streaming, write_ilda_file_zst, write_test_square
+
+
+def _square(truecolor: bool) -> list:
+    coords = [(-1000, -1000), (1000, -1000), (1000, 1000), (-1000, 1000)]
+    pts = []
+    for i, (x, y) in enumerate(coords):
+        if truecolor:
+            pts.append(IldaPoint(x=x, y=y, blanked=(i == 0), r=255, g=i * 10, b=0))
+        else:
+            pts.append(IldaPoint(x=x, y=y, blanked=(i == 0), color_index=7))
+    return pts
+
+
+def test_indexed_round_trip(tmp_path):
+    frames = [IldaFrame(name=f"F{i:04d}", company="LPIP", points=_square(False)) for i in range(3)]
+    out = write_ilda_file(tmp_path / "square.ild", frames, mode="indexed")
+
+    read, _palette, counts = load_ilda_frames(out)
+    assert counts == {"0": 3}
+    assert [fr.frame_number for fr in read] == [0, 1, 2]
+    assert all(fr.total_frames == 3 for fr in read)
+    assert read[0].frame_name == "F0000"
+    assert read[0].company_name == "LPIP"
+    # (x, y, z, status, color_index): first point blanked, last point flagged
+    assert read[0].points[0] == (-1000, -1000, 0, 0x40, 7)
+    assert read[0].points[-1] == (-1000, 1000, 0, 0x80, 7)
+
+
+def test_truecolor_round_trip_clamps_values(tmp_path):
+    pts = _square(True) + [IldaPoint(x=40000, y=-40000, r=300, g=-5, b=None)]
+    out = write_ilda_file(tmp_path / "square_tc.ild", [IldaFrame(points=pts)], mode="truecolor")
+
+    read, _palette, counts = load_ilda_frames(out)
+    assert counts == {"5": 1}
+    # (x, y, status, r, g, b)
+    assert read[0].points[1] == (1000, -1000, 0x00, 255, 10, 0)
+    assert read[0].points[-1] == (32767, -32768, 0x80, 255, 0, 255)
+
+
+def test_eof_header_is_appended(tmp_path):
+    out = write_ilda_file(
+        tmp_path / "eof.ild",
+        [IldaFrame(points=_square(False))],
+        include_eof_header=True,
+    )
+    data = out.read_bytes()
+    assert len(data) == 32 + 4 * 8 + 32
+    assert data[-32:-28] == b"ILDA"
+    assert data[-8:-6] == b"\x00\x00"
+
+
+def test_frame_array_matches_point_list(tmp_path):
+    for truecolor in (False, True):
+        frame = IldaFrame(name="SOA", points=_square(truecolor))
+        arr = frame.to_array()
+        assert isinstance(arr, IldaFrameArray)
+        assert len(arr) == 4 and arr.has_rgb == truecolor
+
+        a = write_ilda_file(tmp_path / "list.ild", [frame])
+        b = write_ilda_file(tmp_path / "soa.ild", [arr])
+        assert a.read_bytes() == b.read_bytes()
+
+
+def test_write_test_square(tmp_path):
+    out = write_test_square(tmp_path / "test_square.ild")
+
+    read, _palette, counts = load_ilda_frames(out)
+    assert counts == {"0": 1}
+    pts = read[0].points
+    assert len(pts) == 5
+    assert pts[0][:2] == pts[-1][:2]
+    assert pts[0][3] == 0x40 and pts[-1][3] == 0x80
+
+
+def test_zst_variant_decompresses_to_plain_file(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    frames = [IldaFrame(points=_square(False)) for _ in range(10)]
+
+    plain = write_ilda_file(tmp_path / "plain.ild", frames)
+    packed = write_ilda_file_zst(tmp_path / "packed.ild.zst", frames)
+    raw = zstandard.ZstdDecompressor().decompress(packed.read_bytes())
+    assert raw == plain.read_bytes()
+
+
+def test_streaming_writer_matches_write_ilda_file(tmp_path):
+    frames = [IldaFrame(name=f"F{i:04d}", points=_square(i % 2 == 1)) for i in range(4)]
+
+    a = write_ilda_file(tmp_path / "a.ild", frames, include_eof_header=True)
+    b = write_ilda_file_streaming(
+        tmp_path / "b.ild", (fr for fr in frames), total_frames=4, include_eof_header=True
+    )
+    assert a.read_bytes() == b.read_bytes()
+
+    with pytest.raises(ValueError):
+        write_ilda_file_streaming(tmp_path / "c.ild", iter(frames), total_frames=5)
+
+    # same format for every frame: shared header template, names still per frame
+    same = [IldaFrame(name=f"F{i:04d}", points=_square(False)) for i in range(3)]
+    a = write_ilda_file(tmp_path / "same_a.ild", same)
+    b = write_ilda_file_streaming(tmp_path / "same_b.ild", iter(same), total_frames=3)
+    assert a.read_bytes() == b.read_bytes()
+    read, _palette, _counts = load_ilda_frames(a)
+    assert [fr.frame_name for fr in read] == ["F0000", "F0001", "F0002"]
+
+
+def test_memmap_writer_matches_write_ilda_file(tmp_path):
+    frames = [IldaFrame(points=_square(i % 2 == 0)) for i in range(3)]
+
+    a = write_ilda_file(tmp_path / "a.ild", frames, include_eof_header=True)
+    b = write_ilda_file_memmap(tmp_path / "b.ild", frames, include_eof_header=True)
+    assert a.read_bytes() == b.read_bytes()